@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the scraper and stream resolution paths of stream.py.
+
+A local HTTP server stands in for both FlixHQ and the decryption API. It
+serves the HTML/JSON fixtures in benchmarks/fixtures and synthetic m3u8
+playlists, with configurable latency and seeded jitter so runs are
+repeatable. Each scenario drives the real StreamApp methods without any
+prompts and reports latency, request count and parse time.
+
+    python benchmarks/bench.py
+    python benchmarks/bench.py --latency 80 --jitter 20 --json base.json
+    python benchmarks/bench.py --compare base.json
+"""
+
+import os
+import sys
+import re
+import json
+import time
+import random
+import argparse
+import tempfile
+import platform
+import threading
+import subprocess
+from contextlib import redirect_stdout
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+sys.path.insert(0, ROOT)
+
+import stream  # noqa: E402
+
+# --- Fake Site ---
+
+class FakeSite:
+    """
+    Serves FlixHQ-shaped fixtures, decryption API responses and HLS playlists
+    on 127.0.0.1. Every request sleeps latency +/- jitter milliseconds.
+    """
+    ROUTES = [
+        ("/search/", "search.html"),
+        ("/ajax/v2/tv/seasons/", "seasons.html"),
+        ("/ajax/v2/season/episodes/", "episodes.html"),
+        ("/ajax/v2/episode/servers/", "servers.html"),
+        ("/ajax/movie/episodes/", "movie_servers.html"),
+    ]
+
+    def __init__(self, latency=0.0, jitter=0.0, seed=0, variants=3, segments=8, segment_kb=64):
+        self.latency = latency / 1000
+        self.jitter = jitter / 1000
+        self.rng = random.Random(seed)
+        self.variants = variants
+        self.segments = segments
+        self.segment_kb = segment_kb
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.fixtures = {}
+        for name in os.listdir(FIXTURES):
+            with open(os.path.join(FIXTURES, name), 'r') as f:
+                self.fixtures[name] = f.read()
+
+        site = self
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args): pass
+            def do_GET(self): site.handle(self)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+    def reset(self):
+        with self.lock: self.requests = 0
+
+    def delay(self):
+        with self.lock:
+            self.requests += 1
+            d = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+        if d > 0: time.sleep(d)
+
+    def master(self, sid, count):
+        lines = ["#EXTM3U"]
+        for i in range(count):
+            height = 144 + (1080 - 144) * i // max(count - 1, 1)
+            width = height * 16 // 9
+            lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={200000 + i * 25000},RESOLUTION={width}x{height},'
+                         f'FRAME-RATE=23.976,CODECS="avc1.640028,mp4a.40.2"')
+            lines.append(f"{height}-{i}/index.m3u8")
+        return "\n".join(lines) + "\n"
+
+    def media(self):
+        lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:6", "#EXT-X-MEDIA-SEQUENCE:0"]
+        for i in range(self.segments):
+            lines += ["#EXTINF:6.000000,", f"seg-{i}-v1-a1.ts"]
+        return "\n".join(lines + ["#EXT-X-ENDLIST"]) + "\n"
+
+    def handle(self, req):
+        self.delay()
+        path = req.path
+        body, ctype = None, "text/html; charset=UTF-8"
+
+        for prefix, fixture in self.ROUTES:
+            if path.startswith(prefix): body = self.fixtures[fixture]
+        page = re.search(r'[?&]page=(\d+)', path)
+        if path.startswith("/search/") and page and page.group(1) != "1":
+            # Later pages list different titles: shift every media id
+            offset = int(page.group(1)) * 100000
+            body = re.sub(r'-(\d+)"', lambda m: f'-{int(m.group(1)) + offset}"', body)
+        if path.startswith("/ajax/episode/sources/"):
+            body = self.fixtures["sources.json"].replace("{base}", self.url).replace("{id}", path.rsplit("/", 1)[1])
+            ctype = "application/json"
+        elif path.startswith("/?url="):
+            sid = path.split("?z=")[0].rsplit("/", 1)[1]
+            body = self.fixtures["decrypt.json"].replace("{base}", self.url).replace("{id}", sid)
+            ctype = "application/json"
+        elif path.endswith("/master.m3u8"):
+            sid = path.split("/")[2]
+            body = self.master(sid, 200 if sid == "big" else self.variants)
+            ctype = "application/vnd.apple.mpegurl"
+        elif path.endswith("/index.m3u8"):
+            body, ctype = self.media(), "application/vnd.apple.mpegurl"
+        elif path.startswith("/subs/"):
+            body = f"WEBVTT\n\n00:00:01.000 --> 00:00:03.000\n{path}\n"
+            ctype = "text/vtt"
+        elif path.endswith(".ts"):
+            data = bytes(self.segment_kb * 1024)
+            req.send_response(200)
+            req.send_header("Content-Type", "video/mp2t")
+            req.send_header("Content-Length", str(len(data)))
+            req.end_headers()
+            req.wfile.write(data)
+            return
+
+        if body is None:
+            req.send_response(404)
+            req.send_header("Content-Length", "0")
+            req.end_headers()
+            return
+        data = body.encode()
+        req.send_response(200)
+        req.send_header("Content-Type", ctype)
+        req.send_header("Content-Length", str(len(data)))
+        req.end_headers()
+        req.wfile.write(data)
+
+# --- Scenarios ---
+
+def cold(app):
+    app.cache.clear()
+    app.decrypt_cache.clear()
+    app.titles.clear()
+    app.subtitles.clear()
+    app.playlists.clear()
+    app.throughput = None
+
+def season_walk(app):
+    seasons = app.get_seasons("39520")
+    episodes = app.get_episodes(seasons[0]['id'])
+    for ep in episodes:
+        app.resolve_servers(app.get_servers(ep['data_id']))
+
+def subtitles(app):
+    app.local_subs([f"{app.config.get('base_url')}/subs/9001/track-{i}.vtt" for i in range(4)])
+
+def master_200(app):
+    app.enforce_quality(f"{app.config.get('base_url')}/hls/big/master.m3u8", "720")
+
+# name -> (config overrides, untimed setup, timed run)
+SCENARIOS = {
+    "cold_search": ({}, cold, lambda app: app.search("the last house")),
+    "warm_search": ({}, lambda app: None, lambda app: app.search("the last house")),
+    "prefix_search": ({}, lambda app: app.search("the last house"), lambda app: app.search("the last ho")),
+    "season_walk": ({"quality": "Best"}, cold, season_walk),
+    "season_walk_720": ({"quality": "720"}, cold, season_walk),
+    "warm_season_walk": ({"quality": "Best"}, lambda app: None, season_walk),
+    "subtitles": ({}, cold, subtitles),
+    "master_200": ({}, cold, master_200),
+}
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+def isolate(workdir):
+    """
+    Points stream.py's JSON state files at workdir by absolute path. Race
+    losers abandoned by resolve_servers can outlive a scenario, and a late
+    write must not follow the process back into the repository.
+    """
+    for cls in (stream.ServerStats, stream.MirrorHealth, stream.WatchHistory):
+        cls.FILE_NAME = os.path.join(workdir, os.path.basename(cls.FILE_NAME))
+
+def run_scenario(name, site, iterations, workdir):
+    overrides, setup, body = SCENARIOS[name]
+    os.chdir(workdir)
+    isolate(workdir)
+    app = stream.StreamApp(trace_file=os.path.join(workdir, f"{name}.jsonl"))
+    app.config.data.update({"base_url": site.url, "api_url": site.url, "mpv_ipc": False, "prefetch": False})
+    app.config.data.update(overrides)
+    app.update_headers()
+
+    with redirect_stdout(open(os.devnull, 'w')):
+        setup(app)
+        body(app) # Warm-up: imports, connection pool, regex compilation
+
+        times, requests, parse = [], [], []
+        for _ in range(iterations):
+            setup(app)
+            site.reset()
+            app.tracer.records.clear()
+            start = time.perf_counter()
+            body(app)
+            times.append((time.perf_counter() - start) * 1000)
+            requests.append(site.requests)
+            parse.append(sum(r['ms'] for r in app.tracer.records if r['stage'] == 'parse'))
+
+    app.executor.shutdown(wait=True)
+    app.cache.db.close()
+    app.decrypt_cache.db.close()
+    app.titles.db.close()
+    app.tracer.file.close()
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(times, 50), 2),
+        "p95_ms": round(percentile(times, 95), 2),
+        "requests": round(sum(requests) / iterations, 1),
+        "parse_ms": round(sum(parse) / iterations, 2),
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def print_table(results, baseline=None):
+    print(f"{'Scenario':<18}{'p50 ms':>10}{'p95 ms':>10}{'Requests':>10}{'Parse ms':>10}", end="")
+    print(f"{'vs base':>10}" if baseline else "")
+    for name, r in results.items():
+        print(f"{name:<18}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['requests']:>10.1f}{r['parse_ms']:>10.2f}", end="")
+        base = (baseline or {}).get(name)
+        if base and base['p50_ms']:
+            print(f"{(r['p50_ms'] - base['p50_ms']) / base['p50_ms'] * 100:>+9.1f}%")
+        else:
+            print()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stream.py against a local fake site.")
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                        help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("-n", "--iterations", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=20.0, help="per-request latency in ms")
+    parser.add_argument("--jitter", type=float, default=5.0, help="uniform +/- jitter in ms")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--parser", choices=["lxml", "html.parser"], help="force the HTML parser backend")
+    parser.add_argument("--json", metavar="FILE", help="write results to FILE")
+    parser.add_argument("--compare", metavar="FILE", help="show p50 change against an earlier --json run")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown: parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    if args.parser: stream.HTML_PARSER = args.parser
+
+    site = FakeSite(args.latency, args.jitter, args.seed)
+    results = {}
+    try:
+        for name in args.scenarios or SCENARIOS:
+            # Abandoned race losers may still be writing to the workdir on exit
+            with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as workdir:
+                results[name] = run_scenario(name, site, args.iterations, workdir)
+    finally:
+        os.chdir(ROOT)
+        site.close()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)["results"]
+    print_table(results, baseline)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "settings": {"iterations": args.iterations, "latency": args.latency,
+                             "jitter": args.jitter, "seed": args.seed, "parser": stream.HTML_PARSER},
+                "results": results,
+            }, f, indent=4)
+
+if __name__ == "__main__":
+    main()
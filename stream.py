@@ -1,14 +1,88 @@
 #!/usr/bin/env python3                                                                                                                       
                                                                                                                                              
+import time
+STARTED = time.perf_counter()  # Reference point for --time-startup
+                                                                                                                                             
 import sys                                                                                                                                   
 import os                                                                                                                                    
 import re                                                                                                                                    
 import json                                                                                                                                  
 import shutil                                                                                                                                
+import hashlib
+import calendar
+import socket
+import sqlite3
+import tempfile
+import argparse
+import importlib
+import importlib.util
+import threading
+import functools
 import subprocess                                                                                                                            
-import requests                                                                                                                              
-from urllib.parse import urljoin                                                                                                             
-from bs4 import BeautifulSoup                                                                                                                
+from contextlib import contextmanager
+from urllib.parse import urljoin, urlparse, urlencode, parse_qs
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait as wait_futures
+
+# --- Lazy Imports ---
+
+class LazyModule:
+    """
+    Stands in for a module and imports it on first attribute access, keeping
+    requests, bs4, lxml and http.server off the path to the first prompt.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.module = None
+
+    def __getattr__(self, attr):
+        if self.module is None: self.module = importlib.import_module(self.name)
+        return getattr(self.module, attr)
+
+requests = LazyModule("requests")
+bs4 = LazyModule("bs4")
+lxml_html = LazyModule("lxml.html")
+http_server = LazyModule("http.server") # Only the resolver daemon needs it
+
+# Optional: lxml extracts elements roughly 10x faster than BeautifulSoup
+HTML_PARSER = 'lxml' if importlib.util.find_spec("lxml") else 'html.parser'
+
+# --- State Files ---
+
+def write_json_atomic(path, data, indent=4):
+    """
+    Writes data as JSON to a temp file and renames it over path, so a crash
+    mid-write leaves the previous version intact.
+    """
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp, path)
+
+class JsonState:
+    """
+    A dict loaded from FILE_NAME and kept in memory. Changes set dirty under
+    the lock; flush() writes them back atomically, off the hot path.
+    """
+    FILE_NAME = None
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.dirty = False
+        try:
+            with open(self.FILE_NAME, 'r') as f:
+                self.data = json.load(f)
+        except Exception:
+            self.data = {}
+
+    def flush(self):
+        with self.lock:
+            if not self.dirty: return
+            try:
+                write_json_atomic(self.FILE_NAME, self.data)
+                self.dirty = False
+            except OSError: pass
                                                                                                                                              
 # --- Configuration Manager ---                                                                                                              
                                                                                                                                              
@@ -19,19 +93,39 @@ class Config:
         "base_url": "https://flixhq.to",                                                                                                     
         "api_url": "https://dec.eatmynerds.live",                                                                                            
         "provider": "Vidcloud", # Options: Vidcloud, UpCloud                                                                                 
-        "quality": "Best",      # Options: Best, 1080, 720, 480, 360                                                                         
+        "quality": "Best",      # Options: Best, Auto, 1080, 720, 480, 360                                                                         
+        "base_mirrors": [],     # Fallbacks for base_url, e.g. ["https://flixhq.ws"]
+        "api_mirrors": [],      # Fallbacks for api_url
         "sub_language": "english",                                                                                                           
+        "subs_cache_mb": 20,    # Size cap of the local subtitle cache
+        "subs_wait": 3,         # Seconds playback waits for subtitle downloads                                                                                                           
         "autoplay": False,                                                                                                                   
+        "prefetch": True,       # Resolve the next episode while the current one plays
+        "prefetch_ttl": 1800,   # Seconds before a prefetched link is re-resolved
+        "decrypt_ttl": 1800,    # Seconds a decrypted stream is reused when its URL carries no expiry
+        "cache": True,          # Cache search/season/episode/server listings on disk
+        "cache_max_mb": 50,
+        "race_servers": True,   # Resolve all servers at once and take the first that works
+        "mpv_ipc": True,        # Keep one mpv running and queue episodes over its IPC socket
+        "download_dir": "downloads",
+        "download_workers": 8,  # Parallel segment fetches across all downloads
+        "resolve_workers": 4,   # Episodes resolved side by side when building a season playlist
+        "resolve_rate": 5,      # Episode resolutions started per second (0 = no limit)
+        "playlist_dir": "playlists",
+        "profile": False,       # Same as --profile: trace stage timings to stream_trace.jsonl
+        "search_pages": 3,      # Result pages fetched (concurrently) per search
+        "remote": "",           # Same as --remote: URL of a resolver started with 'stream.py serve'
         "mpv_options": ""                                                                                       
     }                                                                                                                                        
                                                                                                                                              
     def __init__(self):                                                                                                                      
+        self.dirty = False
         self.data = self.load()                                                                                                              
                                                                                                                                              
     def load(self):                                                                                                                          
         if not os.path.exists(self.FILE_NAME):                                                                                               
-            self.save(self.DEFAULTS)                                                                                                         
-            return self.DEFAULTS.copy()                                                                                                      
+            self.save(self.DEFAULTS.copy())
+            return self.data
                                                                                                                                              
         try:                                                                                                                                 
             with open(self.FILE_NAME, 'r') as f:                                                                                             
@@ -45,17 +139,1064 @@ class Config:
             return self.DEFAULTS.copy()                                                                                                      
                                                                                                                                              
     def save(self, data=None):                                                                                                               
+        """
+        Writes the config atomically, so a crash mid-write keeps the old file.
+        """
         if data: self.data = data                                                                                                            
-        with open(self.FILE_NAME, 'w') as f:                                                                                                 
-            json.dump(self.data, f, indent=4)                                                                                                
+        write_json_atomic(self.FILE_NAME, self.data)
+        self.dirty = False
                                                                                                                                              
     def get(self, key):                                                                                                                      
         return self.data.get(key, self.DEFAULTS.get(key))                                                                                    
                                                                                                                                              
     def set(self, key, value):                                                                                                               
+        # Batched: written in one go by flush() when the settings menu closes
         self.data[key] = value                                                                                                               
-        self.save()                                                                                                                          
-                                                                                                                                             
+        self.dirty = True
+
+    def flush(self):
+        if self.dirty: self.save()
+
+# --- Response Cache ---
+
+class ResponseCache:
+    FILE_NAME = "stream_cache.db"
+
+    # Seconds a cached response is fresh, per endpoint class. Paths not listed
+    # here are never cached.
+    TTLS = [
+        (re.compile(r'^/search/'), 6 * 3600),
+        (re.compile(r'^/ajax/v2/tv/seasons/'), 7 * 86400),
+        (re.compile(r'^/ajax/v2/season/episodes/'), 86400),
+        (re.compile(r'^/ajax/v2/episode/servers/'), 3600),
+        (re.compile(r'^/ajax/movie/episodes/'), 3600),
+    ]
+    STALE_FACTOR = 4  # Stale entries are served (and revalidated) up to ttl * STALE_FACTOR
+
+    def __init__(self, max_mb=50):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.FILE_NAME, check_same_thread=False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            url TEXT PRIMARY KEY, body TEXT, stored REAL, accessed REAL, size INTEGER)""")
+        self.db.commit()
+
+    def ttl_for(self, url):
+        path = urlparse(url).path
+        for pattern, ttl in self.TTLS:
+            if pattern.match(path): return ttl
+        return None
+
+    def get(self, url):
+        """
+        Returns (body, age) for a cached url, or (None, None) on a miss.
+        """
+        with self.lock:
+            row = self.db.execute("SELECT body, stored FROM responses WHERE url = ?", (url,)).fetchone()
+            if not row: return None, None
+            self.db.execute("UPDATE responses SET accessed = ? WHERE url = ?", (time.time(), url))
+            self.db.commit()
+        return row[0], time.time() - row[1]
+
+    def put(self, url, body):
+        now = time.time()
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                            (url, body, now, now, len(body.encode())))
+            self.evict()
+            self.db.commit()
+
+    def evict(self):
+        # Drop least recently used entries until we are back under the size cap
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes: return
+        for url, size in self.db.execute("SELECT url, size FROM responses ORDER BY accessed").fetchall():
+            if total <= self.max_bytes: break
+            self.db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM responses")
+            self.db.commit()
+                                                                                                                                             
+# --- Decryption Cache ---
+
+class DecryptCache:
+    """
+    Keeps decrypted source payloads per source id in the response cache
+    database. Entries live until the earliest expiry token found in their
+    stream URLs, or for a default TTL when the URLs carry none.
+    """
+    # exp=, expires=, e=, validto= ... holding a unix time in seconds or ms
+    EXPIRY_TOKEN = re.compile(r'(?:^|[?&~/,;])(?:expires?|expiry|exp|e|valid_?to|valid_?until)[=:/](\d{10,13})(?!\d)', re.I)
+    EXPIRY_MARGIN = 60  # Seconds shaved off an expiry so a link is never handed out about to die
+    MAX_EXPIRY = 30 * 86400  # Tokens further from now than this are probably ids, not times
+
+    def __init__(self, default_ttl=1800):
+        self.default_ttl = default_ttl
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(ResponseCache.FILE_NAME, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS decrypted (source_id TEXT PRIMARY KEY, data TEXT, expires REAL)")
+        self.db.commit()
+
+    @classmethod
+    def expiry(cls, url):
+        """
+        Returns the earliest plausible expiry time carried by url, or None.
+        Times already past count, so an expired link is never cached; only
+        ones more than MAX_EXPIRY away either way are taken for ids.
+        """
+        now = time.time()
+        times = []
+        for match in cls.EXPIRY_TOKEN.finditer(url):
+            value = int(match.group(1))
+            times.append(value / 1000 if value > 1e12 else value)
+        query = {k.lower(): v[0] for k, v in parse_qs(urlparse(url).query).items()}
+        if 'x-amz-date' in query and query.get('x-amz-expires', '').isdigit():
+            try:
+                signed = calendar.timegm(time.strptime(query['x-amz-date'], "%Y%m%dT%H%M%SZ"))
+                times.append(signed + int(query['x-amz-expires']))
+            except ValueError: pass
+        times = [t for t in times if abs(t - now) < cls.MAX_EXPIRY]
+        return min(times) if times else None
+
+    def ttl_for(self, data):
+        expiries = [self.expiry(s.get('file', '')) for s in data.get('sources', [])]
+        expiries = [e for e in expiries if e]
+        if not expiries: return self.default_ttl
+        return min(expiries) - time.time() - self.EXPIRY_MARGIN
+
+    def get(self, source_id):
+        with self.lock:
+            row = self.db.execute("SELECT data, expires FROM decrypted WHERE source_id = ?", (source_id,)).fetchone()
+        if not row or row[1] <= time.time(): return None
+        return json.loads(row[0])
+
+    def put(self, source_id, data):
+        ttl = self.ttl_for(data)
+        if ttl <= 0: return
+        with self.lock:
+            self.db.execute("DELETE FROM decrypted WHERE expires <= ?", (time.time(),))
+            self.db.execute("INSERT OR REPLACE INTO decrypted VALUES (?, ?, ?)",
+                            (source_id, json.dumps(data), time.time() + ttl))
+            self.db.commit()
+
+    def delete(self, source_id):
+        with self.lock:
+            self.db.execute("DELETE FROM decrypted WHERE source_id = ?", (source_id,))
+            self.db.commit()
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM decrypted")
+            self.db.commit()
+                                                                                                                                             
+# --- Subtitle Cache ---
+
+class SubtitleCache:
+    """
+    Local copies of subtitle files, stored under the SHA-256 of their content
+    with an index from URL to file, so a replay never downloads them again
+    and mpv reads them from disk. Least recently used files are evicted past
+    the size cap.
+    """
+    DIR_NAME = "stream_subs"
+    EXTENSIONS = ('.vtt', '.srt', '.ass', '.ssa', '.sub')
+
+    def __init__(self, max_mb=20):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.lock = threading.Lock()
+        self.index_path = os.path.join(self.DIR_NAME, "index.json")
+        try:
+            with open(self.index_path, 'r') as f:
+                self.index = json.load(f)
+        except Exception:
+            self.index = {}
+
+    def path(self, url):
+        name = self.index.get(url)
+        path = os.path.join(self.DIR_NAME, name) if name else None
+        return path if path and os.path.exists(path) else None
+
+    def download(self, session, url):
+        response = session.get(url, timeout=10)
+        response.raise_for_status()
+        ext = os.path.splitext(urlparse(url).path)[1].lower()
+        name = hashlib.sha256(response.content).hexdigest() + (ext if ext in self.EXTENSIONS else '.vtt')
+        path = os.path.join(self.DIR_NAME, name)
+        with self.lock:
+            os.makedirs(self.DIR_NAME, exist_ok=True)
+            if not os.path.exists(path):
+                with open(path + ".tmp", 'wb') as f:
+                    f.write(response.content)
+                os.replace(path + ".tmp", path)
+            self.index[url] = name
+            self.evict()
+            write_json_atomic(self.index_path, self.index, indent=None)
+        return path
+
+    def fetch(self, session, urls, wait):
+        """
+        Returns {url: local path} for urls, downloading missing files
+        concurrently. Files not in within wait seconds are left out; their
+        downloads finish in the background for next time.
+        """
+        found, missing = {}, []
+        for url in urls:
+            path = self.path(url)
+            if path:
+                try:
+                    os.utime(path) # Recently used; evicted last
+                    found[url] = path
+                    continue
+                except FileNotFoundError: pass # Evicted by a concurrent download
+            missing.append(url)
+        if not missing: return found
+
+        pool = ThreadPoolExecutor(max_workers=len(missing))
+        futures = {pool.submit(self.download, session, url): url for url in missing}
+        done, _ = wait_futures(futures, timeout=wait)
+        pool.shutdown(wait=False)
+        for future in done:
+            try: found[futures[future]] = future.result()
+            except Exception: pass # Left to mpv, which fetches the URL itself
+        return found
+
+    def evict(self):
+        files = [os.path.join(self.DIR_NAME, n) for n in os.listdir(self.DIR_NAME) if n.endswith(self.EXTENSIONS)]
+        files = sorted(files, key=os.path.getmtime)
+        total = sum(os.path.getsize(p) for p in files)
+        for path in files:
+            if total <= self.max_bytes: break
+            total -= os.path.getsize(path)
+            os.remove(path)
+            gone = os.path.basename(path)
+            self.index = {u: n for u, n in self.index.items() if n != gone}
+
+    def clear(self):
+        with self.lock:
+            shutil.rmtree(self.DIR_NAME, ignore_errors=True)
+            self.index = {}
+                                                                                                                                             
+# --- Title Index ---
+
+class TitleIndex:
+    """
+    Every title ever seen in search results, kept in an SQLite full-text
+    index, plus the results of each query searched on the site. Repeated and
+    prefix searches are answered from it without the network. Falls back to
+    LIKE matching when SQLite lacks FTS5.
+    """
+    FILE_NAME = "stream_titles.db"
+    LIMIT = 50
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.FILE_NAME, check_same_thread=False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS titles (
+            id TEXT PRIMARY KEY, title TEXT, type TEXT, year TEXT, seen REAL)""")
+        self.db.execute("CREATE TABLE IF NOT EXISTS queries (query TEXT PRIMARY KEY, ids TEXT, fetched REAL)")
+        try:
+            self.db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS titles_fts USING fts5(title, content='titles')")
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+        self.db.commit()
+
+    @staticmethod
+    def normalize(query):
+        return ' '.join(re.findall(r'\w+', query.lower()))
+
+    def add(self, query, results):
+        """
+        Indexes results and remembers them, in order, as the answer to query.
+        """
+        now = time.time()
+        with self.lock:
+            for r in results:
+                row = self.db.execute("SELECT rowid, title FROM titles WHERE id = ?", (r['id'],)).fetchone()
+                if row:
+                    self.db.execute("UPDATE titles SET title = ?, type = ?, year = ?, seen = ? WHERE rowid = ?",
+                                    (r['title'], r['type'], r['year'], now, row[0]))
+                    if self.fts and row[1] != r['title']:
+                        self.db.execute("INSERT INTO titles_fts (titles_fts, rowid, title) VALUES ('delete', ?, ?)", row)
+                        self.db.execute("INSERT INTO titles_fts (rowid, title) VALUES (?, ?)", (row[0], r['title']))
+                else:
+                    cur = self.db.execute("INSERT INTO titles VALUES (?, ?, ?, ?, ?)",
+                                          (r['id'], r['title'], r['type'], r['year'], now))
+                    if self.fts:
+                        self.db.execute("INSERT INTO titles_fts (rowid, title) VALUES (?, ?)", (cur.lastrowid, r['title']))
+            self.db.execute("INSERT OR REPLACE INTO queries VALUES (?, ?, ?)",
+                            (self.normalize(query), json.dumps([r['id'] for r in results]), now))
+            self.db.commit()
+
+    def lookup(self, query):
+        """
+        Returns the stored results of a query searched before, or index matches
+        when query is the start of one. Returns [] when the index can't answer.
+        """
+        query = self.normalize(query)
+        if not query: return []
+        with self.lock:
+            row = self.db.execute("SELECT ids FROM queries WHERE query = ?", (query,)).fetchone()
+            if row:
+                ids = json.loads(row[0])
+                titles = {r[0]: r for r in self.db.execute(
+                    f"SELECT id, title, type, year FROM titles WHERE id IN ({','.join('?' * len(ids))})", ids)}
+                return [{'title': t, 'id': i, 'type': kind, 'year': y} for i, t, kind, y in filter(None, map(titles.get, ids))]
+            covered = self.db.execute("SELECT 1 FROM queries WHERE substr(query, 1, ?) = ? LIMIT 1",
+                                      (len(query), query)).fetchone()
+        return self.search(query) if covered else []
+
+    def search(self, query):
+        """
+        Returns indexed titles containing every word of query, the last one
+        matched as a prefix.
+        """
+        words = self.normalize(query).split()
+        if not words: return []
+        with self.lock:
+            if self.fts:
+                match = ' '.join(f'"{w}"' for w in words[:-1]) + f' "{words[-1]}"*'
+                rows = self.db.execute("""SELECT t.id, t.title, t.type, t.year FROM titles_fts
+                    JOIN titles t ON t.rowid = titles_fts.rowid WHERE titles_fts MATCH ?
+                    ORDER BY rank LIMIT ?""", (match, self.LIMIT)).fetchall()
+            else:
+                where = ' AND '.join(["title LIKE ?"] * len(words))
+                rows = self.db.execute(f"SELECT id, title, type, year FROM titles WHERE {where} ORDER BY seen DESC LIMIT ?",
+                                       [f"%{w}%" for w in words] + [self.LIMIT]).fetchall()
+        return [{'title': t, 'id': i, 'type': kind, 'year': y} for i, t, kind, y in rows]
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM titles")
+            self.db.execute("DELETE FROM queries")
+            if self.fts: self.db.execute("INSERT INTO titles_fts (titles_fts) VALUES ('delete-all')")
+            self.db.commit()
+                                                                                                                                             
+# --- Watch History ---
+
+class WatchHistory:
+    """
+    The latest playback of each title: the season and episode, where mpv was
+    stopped and whether it ran to the end. Newest first.
+    """
+    FILE_NAME = "stream_history.json"
+    MAX_ENTRIES = 50
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        try:
+            with open(self.FILE_NAME, 'r') as f:
+                self.entries = json.load(f)
+        except Exception:
+            self.entries = []
+
+    def record(self, media, season=None, episode=None, position=None, finished=False):
+        entry = {
+            'media': {'title': media['title'], 'id': media['id'], 'type': media['type']},
+            'season': {'title': season['title'], 'id': season['id']} if season else None,
+            'episode': {'title': episode['title'], 'data_id': episode['data_id']} if episode else None,
+            'position': round(position, 1) if position else None,
+            'finished': finished,
+            'updated': time.time(),
+        }
+        with self.lock:
+            others = [e for e in self.entries if e['media']['id'] != media['id']]
+            self.entries = [entry] + others[:self.MAX_ENTRIES - 1]
+            try: write_json_atomic(self.FILE_NAME, self.entries)
+            except OSError: pass
+
+    def last(self):
+        return self.entries[0] if self.entries else None
+
+# --- Single Flight ---
+
+class SingleFlight:
+    """
+    Collapses concurrent calls that share a key into one execution; callers
+    that arrive while it is running wait for, and share, its result.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, fn):
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader: future = self.calls[key] = Future()
+        if not leader: return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock: del self.calls[key]
+                                                                                                                                             
+# --- Server Stats ---
+
+class ServerStats(JsonState):
+    FILE_NAME = "stream_servers.json"
+
+    ALPHA = 0.3            # EWMA weight of the newest sample
+    FAILURE_PENALTY = 10.0 # Seconds added to a server's score per unit of failure rate
+    UNKNOWN_COST = 5.0     # Score given to servers we have never measured
+
+    @staticmethod
+    def key(name):
+        return re.sub(r'^server\s+', '', name.strip().lower())
+
+    def record(self, name, latency, ok):
+        # Kept in memory; racing threads record at once, so flush() writes later
+        with self.lock:
+            s = self.data.setdefault(self.key(name), {'latency': latency, 'failure': 0.0, 'samples': 0})
+            if ok: s['latency'] = self.ALPHA * latency + (1 - self.ALPHA) * s['latency']
+            s['failure'] = self.ALPHA * (0.0 if ok else 1.0) + (1 - self.ALPHA) * s['failure']
+            s['samples'] += 1
+            self.dirty = True
+
+    def score(self, name):
+        s = self.data.get(self.key(name))
+        if not s: return self.UNKNOWN_COST
+        return s['latency'] + s['failure'] * self.FAILURE_PENALTY
+
+    def rank(self, servers, preferred):
+        """
+        Orders servers fastest-first by historical score. The configured
+        provider wins ties, so it is tried first until we have measurements.
+        """
+        preferred = preferred.lower()
+        return sorted(servers, key=lambda s: (self.score(s['name']), preferred not in s['name'].lower()))
+
+# --- Mirror Health ---
+
+class MirrorHealth(JsonState):
+    """
+    Tracks latency and a circuit breaker per mirror. A mirror that fails
+    FAILURES_TO_OPEN times in a row is skipped for COOLDOWN seconds, then gets
+    a single half-open trial: success closes the circuit, failure re-opens it.
+    """
+    FILE_NAME = "stream_mirrors.json"
+
+    ALPHA = 0.3             # EWMA weight of the newest latency sample
+    FAILURES_TO_OPEN = 3
+    COOLDOWN = 120          # Seconds an open circuit waits before a trial request
+    UNKNOWN_LATENCY = 5.0   # Latency assumed for mirrors we have never measured
+
+    def record(self, url, latency, ok):
+        # Every mirrored request lands here, so only memory is touched; see flush()
+        with self.lock:
+            s = self.data.setdefault(url, {'latency': None, 'failures': 0, 'opened': None})
+            if ok:
+                s['latency'] = latency if s['latency'] is None else self.ALPHA * latency + (1 - self.ALPHA) * s['latency']
+                s['failures'], s['opened'] = 0, None
+            else:
+                s['failures'] += 1
+                if s['failures'] >= self.FAILURES_TO_OPEN: s['opened'] = time.time()
+            self.dirty = True
+
+    def state(self, url):
+        opened = self.data.get(url, {}).get('opened')
+        if not opened: return 'closed'
+        return 'half-open' if time.time() - opened >= self.COOLDOWN else 'open'
+
+    def allow(self, url):
+        """
+        Returns whether a request may go to url, claiming the half-open trial
+        so concurrent callers keep skipping it until the trial resolves.
+        """
+        with self.lock:
+            state = self.state(url)
+            if state == 'half-open': self.data[url]['opened'] = time.time()
+            return state != 'open'
+
+    def order(self, urls):
+        """
+        Orders urls healthiest first: closed circuits by latency, then those due
+        a trial, then open ones. Configuration order breaks ties.
+        """
+        rank = {'closed': 0, 'half-open': 1, 'open': 2}
+        def key(item):
+            idx, url = item
+            latency = self.data.get(url, {}).get('latency')
+            return rank[self.state(url)], self.UNKNOWN_LATENCY if latency is None else latency, idx
+        return [url for _, url in sorted(enumerate(urls), key=key)]
+
+# --- MPV IPC Player ---
+
+class MpvPlayer:
+    """
+    Drives a single long-lived mpv process over its JSON IPC socket, so that
+    episodes are queued into the same window instead of paying process start,
+    config loading and a fresh CDN connection each time.
+    """
+    END_MARGIN = 5  # Seconds from the end at which a file counts as watched
+
+    def __init__(self, ipc_path=None, binary="mpv", tracer=None):
+        self.ipc_path = ipc_path or os.path.join(tempfile.gettempdir(), f"stream-mpv-{os.getpid()}.sock")
+        self.binary = binary    # None attaches to an already listening socket
+        self.tracer = tracer
+        self.load_started = None
+        self.process = None
+        self.sock = None
+        self.buffer = b""
+        self.request_id = 0
+        self.events = deque()   # Events read while waiting for a command reply
+        self.pending_subs = {}  # url -> subtitle urls to add once the file loads
+        self.position = None    # Last known time-pos of the playing file
+        self.duration = None    # Observed duration of the playing file
+        self.eof_reached = False  # Observed eof-reached; with keep-open the file never ends on its own
+
+    def running(self):
+        if self.sock is None: return False
+        return self.process is None or self.process.poll() is None
+
+    def start(self, opts=()):
+        if self.running(): return
+        self.close()
+        if self.binary:
+            if os.path.exists(self.ipc_path): os.remove(self.ipc_path)
+            cmd = [self.binary, "--idle=yes", f"--input-ipc-server={self.ipc_path}", *opts]
+            self.process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL,
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.connect()
+        self.command(["observe_property", 1, "eof-reached"])
+        self.command(["observe_property", 2, "duration"])
+
+    def connect(self, timeout=5):
+        deadline = time.time() + timeout
+        while True:
+            try:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(self.ipc_path)
+                self.sock = sock
+                return
+            except OSError:
+                sock.close()
+                if time.time() > deadline or (self.process and self.process.poll() is not None):
+                    raise
+                time.sleep(0.05)
+
+    def close(self):
+        if self.sock:
+            try: self.sock.sendall(b'{"command": ["quit"]}\n')
+            except OSError: pass
+            self.sock.close()
+        if self.process:
+            try: self.process.wait(timeout=3)
+            except subprocess.TimeoutExpired: self.process.kill()
+            if os.path.exists(self.ipc_path): os.remove(self.ipc_path)
+        self.sock, self.process, self.buffer = None, None, b""
+        self.events.clear()
+        self.pending_subs.clear()
+
+    def read_message(self, timeout=None):
+        """
+        Returns the next JSON message from mpv, or None once the socket closes.
+        Raises socket.timeout if nothing arrives within timeout seconds.
+        """
+        while True:
+            while b"\n" not in self.buffer:
+                self.sock.settimeout(timeout)
+                try:
+                    chunk = self.sock.recv(65536)
+                except socket.timeout: raise
+                except OSError: chunk = b""
+                if not chunk: return None
+                self.buffer += chunk
+            line, self.buffer = self.buffer.split(b"\n", 1)
+            if line.strip(): return json.loads(line)
+
+    def command(self, command):
+        if not self.sock: return None
+        self.request_id += 1
+        try:
+            self.sock.sendall(json.dumps({"command": command, "request_id": self.request_id}).encode() + b"\n")
+            while True:
+                message = self.read_message(timeout=10)
+                if message is None: return None
+                if 'event' in message: self.events.append(message)
+                elif message.get('request_id') == self.request_id: return message
+        except OSError:
+            return None
+
+    def get_property(self, name):
+        reply = self.command(["get_property", name])
+        if reply and reply.get('error') == 'success': return reply.get('data')
+        return None
+
+    def load(self, url, subs, title, append=False, start=None):
+        # %n% quoting lets the title contain commas and equals signs
+        options = f"force-media-title=%{len(title.encode())}%{title}"
+        if start: options += f",start={start:.0f}"
+        self.pending_subs[url] = subs or []
+        if not append: self.load_started = time.perf_counter()
+        self.command({"name": "loadfile", "url": url,
+                      "flags": "append-play" if append else "replace", "options": options})
+
+    def on_file_loaded(self):
+        self.position = None
+        if self.load_started and self.tracer:
+            self.tracer.record({'stage': 'mpv_startup', 'bytes': 0}, time.perf_counter() - self.load_started)
+        self.load_started = None
+        subs = self.pending_subs.pop(self.get_property("path"), [])
+        for idx, sub in enumerate(subs):
+            self.command(["sub-add", sub, "select" if idx == 0 else "auto"])
+
+    def at_end(self):
+        if self.eof_reached: return True
+        return bool(self.duration and self.position is not None and self.position >= self.duration - self.END_MARGIN)
+
+    def wait(self):
+        """
+        Blocks until the current file ends and returns mpv's end-file reason
+        ('eof', 'stop', 'error', 'quit'). time-pos is polled every second so the
+        last position survives mpv being closed. Stopping or quitting at the
+        end of the file, as keep-open requires, counts as 'eof'.
+        """
+        while True:
+            if self.events:
+                event = self.events.popleft()
+            else:
+                try:
+                    event = self.read_message(timeout=1)
+                except socket.timeout:
+                    pos = self.get_property("time-pos")
+                    if pos is not None: self.position = pos
+                    continue
+
+            if event is None:
+                self.close()
+                return 'eof' if self.at_end() else 'quit'
+            name = event.get('event')
+            if name == 'start-file':
+                self.duration, self.eof_reached = None, False
+            elif name == 'property-change':
+                if event.get('name') == 'eof-reached': self.eof_reached = bool(event.get('data'))
+                elif event.get('name') == 'duration': self.duration = event.get('data')
+            elif name == 'file-loaded':
+                self.on_file_loaded()
+            elif name == 'end-file' and event.get('reason') != 'redirect':
+                reason = event.get('reason', 'eof')
+                if reason == 'quit': self.close()
+                if reason in ('quit', 'stop') and self.at_end(): return 'eof'
+                return reason
+
+# --- HLS Playlist Parser ---
+
+class HlsPlaylist:
+    """
+    Single-pass M3U8 parser for both master and media playlists. All URIs are
+    resolved against the playlist URL.
+    """
+    ATTR_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+    def __init__(self, url, text):
+        self.url = url
+        self.variants = []   # EXT-X-STREAM-INF entries of a master playlist
+        self.media = []      # EXT-X-MEDIA alternate audio/subtitle renditions
+        self.segments = []   # Media segments of a media playlist
+        self.target_duration = None
+        self.parse(text)
+
+    @property
+    def is_master(self):
+        return bool(self.variants)
+
+    @classmethod
+    def attributes(cls, line):
+        attrs = line.split(':', 1)[1] if ':' in line else ''
+        return {k: v.strip('"') for k, v in cls.ATTR_RE.findall(attrs)}
+
+    def parse(self, text):
+        stream_inf = None
+        duration = None
+        byterange = None
+        key = None
+        init = None
+        for line in text.splitlines():
+            line = line.strip()
+            if not line: continue
+
+            if line.startswith('#EXT-X-STREAM-INF'):
+                attrs = self.attributes(line)
+                res = re.match(r'(\d+)x(\d+)', attrs.get('RESOLUTION', ''))
+                stream_inf = {
+                    'bandwidth': int(attrs.get('BANDWIDTH', 0) or 0),
+                    'average_bandwidth': int(attrs.get('AVERAGE-BANDWIDTH', 0) or 0),
+                    'width': int(res.group(1)) if res else None,
+                    'height': int(res.group(2)) if res else None,
+                    'codecs': attrs.get('CODECS'),
+                    'frame_rate': float(attrs['FRAME-RATE']) if attrs.get('FRAME-RATE') else None,
+                    'audio': attrs.get('AUDIO'),
+                    'subtitles': attrs.get('SUBTITLES'),
+                }
+            elif line.startswith('#EXT-X-MEDIA:'):
+                attrs = self.attributes(line)
+                self.media.append({
+                    'type': attrs.get('TYPE'),
+                    'group_id': attrs.get('GROUP-ID'),
+                    'name': attrs.get('NAME'),
+                    'language': attrs.get('LANGUAGE'),
+                    'default': attrs.get('DEFAULT') == 'YES',
+                    'uri': urljoin(self.url, attrs['URI']) if attrs.get('URI') else None,
+                })
+            elif line.startswith('#EXT-X-TARGETDURATION'):
+                self.target_duration = float(line.split(':', 1)[1])
+            elif line.startswith('#EXTINF'):
+                duration = float(line.split(':', 1)[1].split(',', 1)[0])
+            elif line.startswith('#EXT-X-BYTERANGE'):
+                byterange = line.split(':', 1)[1]
+            elif line.startswith('#EXT-X-KEY'):
+                attrs = self.attributes(line)
+                key = None if attrs.get('METHOD', 'NONE') == 'NONE' else {
+                    'method': attrs['METHOD'],
+                    'uri': urljoin(self.url, attrs['URI']) if attrs.get('URI') else None,
+                    'iv': attrs.get('IV'),
+                }
+            elif line.startswith('#EXT-X-MAP'):
+                init = urljoin(self.url, self.attributes(line).get('URI', ''))
+            elif line.startswith('#'):
+                continue
+            elif stream_inf is not None:
+                stream_inf['uri'] = urljoin(self.url, line)
+                self.variants.append(stream_inf)
+                stream_inf = None
+            else:
+                self.segments.append({'uri': urljoin(self.url, line), 'duration': duration,
+                                      'byterange': byterange, 'key': key, 'map': init})
+                duration = byterange = None
+
+    def renditions(self, kind, group_id):
+        return [m for m in self.media if m['type'] == kind and m['group_id'] == group_id]
+
+    def best_variant(self, max_height=None, max_bandwidth=None):
+        """
+        Returns the highest variant within the given limits, preferring higher
+        resolution, then frame rate, then bandwidth. None if nothing fits.
+        """
+        fits = [v for v in self.variants
+                if (max_height is None or (v['height'] or 0) <= max_height)
+                and (max_bandwidth is None or v['bandwidth'] <= max_bandwidth)]
+        if not fits: return None
+        return max(fits, key=lambda v: (v['height'] or 0, v['frame_rate'] or 0, v['bandwidth']))
+
+# --- HLS Downloader ---
+
+class HlsDownloader:
+    """
+    Fetches the segments of an HLS media playlist with a bounded thread pool
+    and appends them in order to a single output file. Progress is recorded
+    in a manifest next to the output so an interrupted download resumes from
+    the last segment written, as long as it is the same variant.
+    """
+    RETRIES = 3
+
+    def __init__(self, session, playlist, path, workers=8, limiter=None, variant=None):
+        self.session = session
+        self.path = path
+        self.manifest_path = path + ".manifest.json"
+        self.workers = workers
+        self.limiter = limiter or threading.BoundedSemaphore(workers) # Shared across downloads for a global cap
+        self.bytes = 0
+        self.elapsed = 0.0
+        self.parts = self.build_parts(playlist)
+        self.variant = self.variant_id(playlist, variant)
+
+    @staticmethod
+    def variant_id(playlist, variant=None):
+        """
+        Identifies the rendition being downloaded by its media playlist path,
+        without the query tokens that change on every resolve, plus bandwidth
+        and resolution when the master playlist listed them. A resumed run
+        that lands on another variant must not append to the first one.
+        """
+        ident = {'path': urlparse(playlist.url).path}
+        if variant:
+            ident.update(bandwidth=variant['bandwidth'], width=variant['width'], height=variant['height'])
+        return ident
+
+    @staticmethod
+    def build_parts(playlist):
+        """
+        Returns (uri, headers) for the init section (if any) and every segment,
+        turning EXT-X-BYTERANGE into Range headers.
+        """
+        parts = []
+        if playlist.segments and playlist.segments[0]['map']:
+            parts.append((playlist.segments[0]['map'], {}))
+        next_offset = {}
+        for segment in playlist.segments:
+            headers = {}
+            if segment['byterange']:
+                length, _, offset = segment['byterange'].partition('@')
+                start = int(offset) if offset else next_offset.get(segment['uri'], 0)
+                headers['Range'] = f"bytes={start}-{start + int(length) - 1}"
+                next_offset[segment['uri']] = start + int(length)
+            parts.append((segment['uri'], headers))
+        return parts
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('parts') == len(self.parts) and manifest.get('variant') == self.variant:
+                return manifest
+        except Exception: pass
+        return {'parts': len(self.parts), 'variant': self.variant, 'written': 0, 'offset': 0}
+
+    def save_manifest(self, written, offset):
+        write_json_atomic(self.manifest_path, {'parts': len(self.parts), 'variant': self.variant,
+                                               'written': written, 'offset': offset}, indent=None)
+
+    def fetch(self, idx):
+        uri, headers = self.parts[idx]
+        for attempt in range(self.RETRIES):
+            try:
+                with self.limiter:
+                    response = self.session.get(uri, headers=headers, timeout=20)
+                response.raise_for_status()
+                return response.content
+            except requests.exceptions.RequestException:
+                if attempt == self.RETRIES - 1: raise
+                time.sleep(1 + attempt)
+
+    def run(self, on_progress=None):
+        """
+        Downloads all remaining parts. Returns True once the output is complete.
+        on_progress(done, total, bytes, elapsed) is called after each write.
+        """
+        if os.path.exists(self.path) and not os.path.exists(self.manifest_path):
+            return True # Finished on an earlier run
+
+        manifest = self.load_manifest()
+        done, offset = manifest['written'], manifest['offset']
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.save_manifest(done, offset)
+
+        # Segments finish out of order; only a window ahead of the write
+        # position is in flight so buffered data stays bounded.
+        window = self.workers * 2
+        futures = {}
+        start = time.time()
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            with open(self.path, 'r+b' if os.path.exists(self.path) else 'wb') as out:
+                out.truncate(offset)
+                out.seek(offset)
+                submitted = done
+                while done < len(self.parts):
+                    while submitted < len(self.parts) and submitted < done + window:
+                        futures[submitted] = pool.submit(self.fetch, submitted)
+                        submitted += 1
+                    data = futures.pop(done).result()
+                    out.write(data)
+                    out.flush()
+                    done += 1
+                    offset += len(data)
+                    self.bytes += len(data)
+                    self.elapsed = time.time() - start
+                    self.save_manifest(done, offset)
+                    if on_progress: on_progress(done, len(self.parts), self.bytes, self.elapsed)
+        except requests.exceptions.RequestException:
+            return False
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        os.remove(self.manifest_path)
+        return True
+
+    @property
+    def rate(self):
+        """Download throughput in MB/s."""
+        return self.bytes / 1e6 / self.elapsed if self.elapsed else 0.0
+
+# --- Rate Limiter ---
+
+class RateLimiter:
+    """
+    Spaces acquire() calls at least 1/rate seconds apart across all threads.
+    A rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval: return
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0: time.sleep(delay)
+
+# --- Profiling ---
+
+class Tracer:
+    """
+    Records wall time, bytes, HTTP status and cache outcome per stage as JSON
+    lines. HTTP responses are attributed to the innermost open span on the
+    calling thread. Does nothing unless a trace file is given.
+    """
+    FILE_NAME = "stream_trace.jsonl"
+
+    def __init__(self, path=None):
+        self.path = path
+        self.records = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.file = open(path, 'a') if path else None
+
+    @property
+    def enabled(self):
+        return self.file is not None
+
+    @contextmanager
+    def span(self, stage, **fields):
+        if not self.file:
+            yield {}
+            return
+        record = {'stage': stage, 'bytes': 0, **fields}
+        parent = getattr(self.local, 'span', None)
+        self.local.span = record
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.local.span = parent
+            self.record(record, time.perf_counter() - start)
+
+    def annotate(self, **fields):
+        record = getattr(self.local, 'span', None)
+        if record is not None: record.update(fields)
+
+    def record(self, record, seconds):
+        if not self.file: return
+        record['ms'] = round(seconds * 1000, 2)
+        record['ts'] = round(time.time(), 3)
+        with self.lock:
+            self.records.append(record)
+            self.file.write(json.dumps(record) + "\n")
+            self.file.flush()
+
+    def on_response(self, response, *args, **kwargs):
+        # requests response hook
+        record = getattr(self.local, 'span', None)
+        if record is None: return
+        record['status'] = response.status_code
+        if kwargs.get('stream'): # Reading content here would download the whole body
+            record['bytes'] += int(response.headers.get('Content-Length') or 0)
+        else:
+            record['bytes'] += len(response.content)
+
+    @staticmethod
+    def percentile(values, pct):
+        values = sorted(values)
+        return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+    def summary(self):
+        stages = {}
+        for r in self.records: stages.setdefault(r['stage'], []).append(r)
+        lines = [f"{'Stage':<16}{'Count':>6}{'p50 ms':>10}{'p95 ms':>10}{'KB':>10}{'Hits':>6}"]
+        for stage, records in stages.items():
+            ms = [r['ms'] for r in records]
+            kb = sum(r['bytes'] for r in records) / 1024
+            hits = sum(1 for r in records if r.get('cache') == 'hit')
+            lines.append(f"{stage:<16}{len(records):>6}{self.percentile(ms, 50):>10.1f}"
+                         f"{self.percentile(ms, 95):>10.1f}{kb:>10.1f}{hits:>6}")
+        return lines
+
+def traced(stage):
+    """Wraps a StreamApp method in a tracer span named stage."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.tracer.span(stage):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+# --- HTML Parsing ---
+
+def element_xpath(tag=None, class_=None, href=False, prefix='//'):
+    xpath = prefix + (tag or '*')
+    if class_: xpath += f'[contains(concat(" ", normalize-space(@class), " "), " {class_} ")]'
+    if href: xpath += '[@href]'
+    return xpath
+
+class Selector:
+    """
+    Names the elements a scraper needs, for both the lxml fast path and the
+    SoupStrainer-restricted BeautifulSoup fallback.
+    """
+    def __init__(self, tag=None, class_=None, href=False):
+        attrs = {}
+        # The strainer sees the raw class string while parsing, so match the
+        # class as a whole word rather than relying on bs4's class splitting.
+        if class_: attrs['class_'] = re.compile(rf'(?:^|\s){re.escape(class_)}(?:\s|$)')
+        if href: attrs['href'] = True
+        self.tag, self.attrs = tag, attrs
+        self.xpath = element_xpath(tag, class_, href)
+
+    @functools.cached_property
+    def strainer(self):
+        return bs4.SoupStrainer(self.tag, **self.attrs)
+
+class LxmlNode:
+    """
+    Wraps an lxml element with the subset of the bs4 Tag API the scrapers use.
+    """
+    def __init__(self, element):
+        self.element = element
+
+    def get(self, key, default=None):
+        return self.element.get(key, default)
+
+    def __getitem__(self, key):
+        return self.element.attrib[key]
+
+    @property
+    def text(self):
+        return self.element.text_content()
+
+    def find(self, name=None, class_=None, href=False):
+        found = self.element.xpath(element_xpath(name, class_, href, prefix='.//'))
+        return LxmlNode(found[0]) if found else None
+
+def select_nodes(text, selectors):
+    """
+    Parses text once and returns the elements matching each of selectors, as
+    LxmlNode when lxml is installed or as bs4 Tags otherwise.
+    """
+    if HTML_PARSER == 'lxml':
+        try:
+            tree = lxml_html.document_fromstring(text)
+            return [[LxmlNode(e) for e in tree.xpath(selector.xpath)] for selector in selectors]
+        except lxml_html.etree.ParserError:
+            return [[] for _ in selectors] # Empty document
+        except ValueError:
+            pass # e.g. an XML encoding declaration in a str; let html.parser handle it
+    # A single selector can skip everything else while parsing; several share one full tree
+    strainer = selectors[0].strainer if len(selectors) == 1 else None
+    soup = bs4.BeautifulSoup(text, 'html.parser', parse_only=strainer)
+    return [soup.find_all(selector.strainer) for selector in selectors]
+
+def load_parser():
+    """
+    Imports the HTML parser backend ahead of the first parse.
+    """
+    if HTML_PARSER == 'lxml': lxml_html.document_fromstring
+    bs4.BeautifulSoup
+
 # --- Visuals ---                                                                                                                            
                                                                                                                                              
 class Colors:                                                                                                                                
@@ -76,18 +1217,83 @@ def check_dependencies():
 # --- Main Application ---                                                                                                                   
                                                                                                                                              
 class StreamApp:                                                                                                                            
-    def __init__(self):                                                                                                                      
-        self.config = Config()                                                                                                               
-        self.session = requests.Session()                                                                                                    
-        self.update_headers()                                                                                                                
+    THROUGHPUT_TTL = 600        # Seconds a throughput measurement is reused
+    THROUGHPUT_HEADROOM = 0.8   # Fraction of measured throughput a variant may use
+    THROUGHPUT_SAMPLE_BYTES = 2_000_000  # Most of a segment read to measure throughput
+    THROUGHPUT_SAMPLE_SECONDS = 3        # Longest a throughput measurement may take
+    CONNECT_TIMEOUT = 3.05      # Seconds to reach a mirror before failing over to the next
+    PROBE_TIMEOUT = 3           # Seconds each mirror gets to answer the startup probe
+    DOWNLOAD_EPISODES = 2       # Episodes fetched side by side in a season download
+    RESUME_REWIND = 5           # Seconds replayed before a saved position when resuming
+    WATCH_LATER_DIR = "stream_watch_later"
+
+    # Elements each scraper reads; everything else is skipped while parsing
+    SEARCH_ITEMS = Selector('div', class_='flw-item')
+    LINKS = Selector('a', href=True)
+    NAV_ITEMS = Selector(class_='nav-item')
+    PAGE_LINKS = Selector('a', class_='page-link', href=True)
+
+    def __init__(self, trace_file=None, config=None, time_startup=False):
+        self.config = config or Config()
+        self.http = None        # requests.Session, created on first use
+        self.http_lock = threading.Lock()
+        self.tracer = Tracer(trace_file or (Tracer.FILE_NAME if self.config.get("profile") else None))
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.quiet = threading.local()  # Set on threads running background() jobs
+        self.cache = ResponseCache(self.config.get("cache_max_mb"))
+        self.decrypt_cache = DecryptCache(self.config.get("decrypt_ttl"))
+        self.decrypt_flight = SingleFlight()
+        self.server_stats = ServerStats()
+        self.titles = TitleIndex()
+        self.history = WatchHistory()
+        self.resume = None      # Future of the plan for 'continue'
+        self.subtitles = SubtitleCache(self.config.get("subs_cache_mb"))
+        self.player = None
+        self.playlists = {}
+        self.throughput = None  # (bits per second, measured at)
+        self.mirror_health = MirrorHealth()
+        self.active_mirrors = {}  # 'base'/'api' -> mirror the last request succeeded on
+        self.startup = {} if time_startup else None
+        self.warmed = False
+                                                                                                                                             
+    @property
+    def session(self):
+        """
+        The shared HTTP session. Built on first use so importing requests
+        happens after the prompt is up, normally during warm_up().
+        """
+        if self.http is None:
+            with self.http_lock:
+                if self.http is None:
+                    session = requests.Session()
+                    if self.tracer.enabled: session.hooks['response'].append(self.tracer.on_response)
+                    self.http = session
+                    self.update_headers()
+        return self.http
                                                                                                                                              
     def update_headers(self):                                                                                                                
-        self.session.headers.update({                                                                                                        
+        if self.http is None: return # Applied when the session is built
+        self.http.headers.update({                                                                                                        
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36', 
-            'Referer': self.config.get("base_url")                                                                                           
+            'Referer': self.active_mirror('base')
         })                                                                                                                                   
                                                                                                                                              
+    def background(self, fn, *args):
+        """
+        Runs fn on the worker pool with notify() silenced on that thread, so
+        speculative work doesn't print over the prompt. Failures surface when
+        the foreground redoes the work.
+        """
+        def job():
+            self.quiet.active = True
+            try:
+                return fn(*args)
+            finally:
+                self.quiet.active = False
+        return self.executor.submit(job)
+
     def notify(self, message, level="Info"):                                                                                                 
+        if getattr(self.quiet, 'active', False): return
         if level == "Error":                                                                                                                 
             print(f"{Colors.FAIL}[!] {message}{Colors.ENDC}")                                                                                
         elif level == "Success":                                                                                                             
@@ -96,14 +1302,142 @@ class StreamApp:
             print(f"{Colors.CYAN}[*] {message}{Colors.ENDC}")                                                                                
         else:                                                                                                                                
             print(f"{message}")                                                                                                              
-                                                                                                                                             
-    def get_soup(self, path):                                                                                                                
+
+    # --- Mirrors ---
+
+    def mirror_urls(self, kind):
+        """
+        Returns the configured mirrors for kind ('base' or 'api'), primary first.
+        """
+        urls = [self.config.get(f"{kind}_url")] + list(self.config.get(f"{kind}_mirrors") or [])
+        return list(dict.fromkeys(u.rstrip('/') for u in urls if u))
+
+    def active_mirror(self, kind):
+        urls = self.mirror_urls(kind)
+        active = self.active_mirrors.get(kind)
+        return active if active in urls else self.config.get(f"{kind}_url")
+
+    def use_mirror(self, kind, mirror):
+        switched = kind in self.active_mirrors
+        previous = self.active_mirror(kind)
+        self.active_mirrors[kind] = mirror
+        if mirror == previous: return
+        if switched: self.notify(f"Switched to mirror {mirror}", "Info")
+        if kind == 'base': self.update_headers()
+
+    def probe_mirrors(self):
+        """
+        Times a request to every configured mirror at once and makes the
+        fastest healthy one active. Each probe leaves a keep-alive connection
+        behind for the first real request.
+        """
+        kinds = ('base', 'api')
+
+        def probe(url):
+            start = time.time()
+            try:
+                response = self.session.head(url, timeout=self.PROBE_TIMEOUT)
+                if response.status_code in (405, 501): # HEAD not allowed or not implemented
+                    response = self.session.get(url, timeout=self.PROBE_TIMEOUT, stream=True)
+                    response.close()
+                self.mirror_health.record(url, response.elapsed.total_seconds(), response.status_code < 500)
+            except requests.exceptions.RequestException:
+                self.mirror_health.record(url, time.time() - start, False)
+
+        with self.tracer.span("mirror_probe"):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(probe, dict.fromkeys(u for k in kinds for u in self.mirror_urls(k))))
+        for kind in kinds:
+            self.active_mirrors[kind] = self.mirror_health.order(self.mirror_urls(kind))[0]
+        self.update_headers()
+
+    def warm_up(self):
+        """
+        Runs while the first prompt waits for input: imports the HTML parser
+        and connects to the site and API, so the first search pays for
+        neither the imports nor DNS and TLS.
+        """
+        with self.tracer.span("warm_up"):
+            load_parser()
+            self.probe_mirrors()
+        self.warmed = True
+
+    def mirror_get(self, kind, path, timeout, **kwargs):
+        """
+        GETs path from the healthiest mirror of kind, failing over to the next
+        one on connection errors and 5xx responses. Mirrors with an open
+        circuit are skipped unless nothing else is left.
+        """
+        response, error = None, None
+        for idx, mirror in enumerate(self.mirror_health.order(self.mirror_urls(kind))):
+            if not self.mirror_health.allow(mirror) and idx: continue
+            start = time.time()
+            try:
+                response = self.session.get(mirror + path, timeout=(self.CONNECT_TIMEOUT, timeout), **kwargs)
+            except requests.exceptions.RequestException as e:
+                response, error = None, e
+                self.mirror_health.record(mirror, time.time() - start, False)
+                continue
+            ok = response.status_code < 500
+            self.mirror_health.record(mirror, response.elapsed.total_seconds(), ok)
+            if ok:
+                self.use_mirror(kind, mirror)
+                return response
+        if response is not None: return response
+        raise error
+                                                                                                                                             
+    def get_nodes(self, path, selector):
+        """
+        Fetches path and returns only the elements matching selector, or None
+        on a network error.
+        """
+        nodes = self.select_page(path, [selector])
+        return None if nodes is None else nodes[0]
+
+    def select_page(self, path, selectors):
+        """
+        Fetches path once and returns the elements matching each of selectors,
+        or None on a network error.
+        """
         url = path if path.startswith("http") else f"{self.config.get('base_url')}{path}"                                                    
+        with self.tracer.span("get_soup", path=urlparse(url).path):
+            text = self.get_text(url)
+        if text is None: return None
+        with self.tracer.span("parse", path=urlparse(url).path, size=len(text), parser=HTML_PARSER):
+            return select_nodes(text, selectors)
+
+    def fetch(self, url):
+        base = self.config.get('base_url').rstrip('/')
+        if url.startswith(base + '/'):
+            # Cached under the primary's URL whichever mirror answers
+            response = self.mirror_get('base', url[len(base):], 15)
+        else:
+            response = self.session.get(url, timeout=15)
+        response.raise_for_status()
+        if self.cache.ttl_for(url): self.cache.put(url, response.text)
+        return response.text
+
+    def get_text(self, url):
+        """
+        Returns the body of url, serving fresh cache hits without touching the
+        network and revalidating stale ones in the background.
+        """
+        ttl = self.cache.ttl_for(url)
+        body, age = self.cache.get(url) if ttl and self.config.get("cache") else (None, None)
+        if body is not None:
+            if age < ttl:
+                self.tracer.annotate(cache='hit')
+                return body
+            if age < ttl * self.cache.STALE_FACTOR:
+                self.tracer.annotate(cache='stale')
+                self.background(self.fetch, url)
+                return body
+
+        self.tracer.annotate(cache='miss' if ttl else None)
         try:                                                                                                                                 
-            response = self.session.get(url, timeout=15)                                                                                     
-            response.raise_for_status()                                                                                                      
-            return BeautifulSoup(response.text, 'html.parser')                                                                               
+            return self.fetch(url)
         except requests.exceptions.RequestException as e:                                                                                    
+            if body is not None: return body # Expired copy beats nothing when offline
             self.notify(f"Network error: {e}", "Error")                                                                                      
             return None                                                                                                                      
                                                                                                                                              
@@ -119,11 +1453,16 @@ class StreamApp:
             print(f"4. Sub Language:  {Colors.YELLOW}{c['sub_language']}{Colors.ENDC}")                                                      
             print(f"5. Autoplay:      {Colors.YELLOW}{'ON' if c['autoplay'] else 'OFF'}{Colors.ENDC}")                                       
             print(f"6. MPV Options:   {Colors.YELLOW}{c['mpv_options']}{Colors.ENDC}")                                                       
+            print(f"7. Prefetch:      {Colors.YELLOW}{'ON' if c['prefetch'] else 'OFF'}{Colors.ENDC}")
+            print(f"8. Cache:         {Colors.YELLOW}{'ON' if c['cache'] else 'OFF (bypass)'}{Colors.ENDC}")
+            print("9. Clear Cache")
             print(f"{Colors.FAIL}b. Back{Colors.ENDC}")                                                                                      
                                                                                                                                              
             choice = input(f"\n{Colors.CYAN}Edit setting # > {Colors.ENDC}").strip().lower()                                                 
                                                                                                                                              
-            if choice == 'b': break                                                                                                          
+            if choice == 'b':
+                self.config.flush()
+                break
                                                                                                                                              
             if choice == '1':                                                                                                                
                 new_val = input("Enter new Base URL (e.g., https://flixhq.to): ").strip()                                                    
@@ -136,9 +1475,9 @@ class StreamApp:
                 if new_val: self.config.set('provider', new_val)                                                                             
                                                                                                                                              
             elif choice == '3':                                                                                                              
-                print("Options: Best, 1080, 720, 480, 360")                                                                                  
+                print("Options: Best, Auto, 1080, 720, 480, 360")
                 new_val = input("Enter Max Quality: ").strip()                                                                               
-                if new_val in ['Best', '1080', '720', '480', '360']:                                                                         
+                if new_val in ['Best', 'Auto', '1080', '720', '480', '360']:
                     self.config.set('quality', new_val)                                                                                      
                 else:                                                                                                                        
                     self.notify("Invalid quality. Using Best.", "Error")                                                                     
@@ -154,73 +1493,149 @@ class StreamApp:
             elif choice == '6':                                                                                                              
                 new_val = input("MPV Options (e.g., --fs): ").strip()                                                                        
                 self.config.set('mpv_options', new_val)                                                                                      
+
+            elif choice == '7':
+                self.config.set('prefetch', not c['prefetch'])
+
+            elif choice == '8':
+                self.config.set('cache', not c['cache'])
+
+            elif choice == '9':
+                self.cache.clear()
+                self.decrypt_cache.clear()
+                self.subtitles.clear()
+                self.titles.clear()
+                self.notify("Cache cleared.", "Success")
                                                                                                                                              
     # --- HLS Quality Parser ---                                                                                                             
-                                                                                                                                             
+
+    def fetch_playlist(self, url):
+        """
+        Downloads and parses an m3u8, caching the result per URL for the session.
+        """
+        if url in self.playlists:
+            self.tracer.record({'stage': 'playlist', 'bytes': 0, 'cache': 'hit'}, 0.0)
+            return self.playlists[url]
+        try:
+            with self.tracer.span("playlist", cache='miss'):
+                response = self.session.get(url, timeout=10)
+                if response.status_code != 200: return None
+                playlist = HlsPlaylist(response.url or url, response.text)
+        except Exception as e:
+            self.notify(f"Playlist error: {e}", "Info")
+            return None
+        self.playlists[url] = playlist
+        return playlist
+
+    def measure_throughput(self, playlist):
+        """
+        Estimates the link's throughput in bits/s by streaming a segment of the
+        highest variant for at most THROUGHPUT_SAMPLE_BYTES or _SECONDS. Only the
+        transfer after the response headers is timed, so latency doesn't drag
+        the estimate down. Reused for THROUGHPUT_TTL seconds.
+        """
+        if self.throughput and time.time() - self.throughput[1] < self.THROUGHPUT_TTL:
+            return self.throughput[0]
+
+        highest = max(playlist.variants, key=lambda v: v['bandwidth'])
+        media = self.fetch_playlist(highest['uri'])
+        if not media or not media.segments: return None
+
+        size = 0
+        try:
+            with self.session.get(media.segments[0]['uri'], timeout=10, stream=True) as response:
+                response.raise_for_status()
+                start = time.perf_counter()
+                for chunk in response.iter_content(64 * 1024):
+                    size += len(chunk)
+                    if size >= self.THROUGHPUT_SAMPLE_BYTES: break
+                    if time.perf_counter() - start >= self.THROUGHPUT_SAMPLE_SECONDS: break
+                elapsed = max(time.perf_counter() - start, 1e-3)
+        except requests.exceptions.RequestException:
+            return None
+        if not size: return None
+        self.throughput = (size * 8 / elapsed, time.time())
+        return self.throughput[0]
+                                                                                                                                             
+    @traced("enforce_quality")
     def enforce_quality(self, master_url, target_quality):                                                                                   
         """                                                                                                                                  
         Parses the master playlist and selects the stream closest to target_quality                                                          
-        without exceeding it.                                                                                                                
+        without exceeding it. "Auto" picks the highest variant the measured
+        throughput can sustain.
         """                                                                                                                                  
         if target_quality == "Best":                                                                                                         
             return master_url                                                                                                                
                                                                                                                                              
-        try:                                                                                                                                 
-            target_height = int(target_quality)                                                                                              
-            response = self.session.get(master_url, timeout=10)                                                                              
-            if response.status_code != 200: return master_url                                                                                
-                                                                                                                                             
-            lines = response.text.splitlines()                                                                                               
-            best_url = None                                                                                                                  
-            best_diff = float('inf')                                                                                                         
-            highest_found = 0                                                                                                                
-                                                                                                                                             
-            # Simple M3U8 parser                                                                                                             
-            for i, line in enumerate(lines):                                                                                                 
-                if line.startswith("#EXT-X-STREAM-INF"):                                                                                     
-                    # Extract resolution                                                                                                     
-                    res_match = re.search(r'RESOLUTION=\d+x(\d+)', line)                                                                     
-                    if res_match:                                                                                                            
-                        height = int(res_match.group(1))                                                                                     
-                        # Find the next non-comment line (the URL)                                                                           
-                        url_line = None                                                                                                      
-                        for k in range(i + 1, len(lines)):                                                                                   
-                            if not lines[k].startswith("#") and lines[k].strip():                                                            
-                                url_line = lines[k].strip()                                                                                  
-                                break                                                                                                        
-                                                                                                                                             
-                        if url_line:                                                                                                         
-                            # Logic: Find the highest quality that is <= target                                                              
-                            if height <= target_height:                                                                                      
-                                # We want the largest one that fits                                                                          
-                                if height > highest_found:                                                                                   
-                                    highest_found = height                                                                                   
-                                    best_url = url_line                                                                                      
-                                                                                                                                             
-                            # Fallback: if we haven't found anything <= target, keep track of smallest available                             
-                            # (Usually not needed if list is standard, but good safety)                                                      
-                                                                                                                                             
-            if best_url:                                                                                                                     
-                # Handle relative URLs                                                                                                       
-                return urljoin(master_url, best_url)                                                                                         
-                                                                                                                                             
-            return master_url # Fallback to master if parsing fails                                                                          
-                                                                                                                                             
-        except Exception as e:                                                                                                               
-            self.notify(f"Quality parsing error: {e}. Using default.", "Info")                                                               
+        playlist = self.fetch_playlist(master_url)
+        if not playlist or not playlist.is_master: return master_url
+                                                                                                                                             
+        if target_quality == "Auto":
+            bps = self.measure_throughput(playlist)
+            if not bps: return master_url
+            variant = playlist.best_variant(max_bandwidth=bps * self.THROUGHPUT_HEADROOM)
+            if not variant: variant = min(playlist.variants, key=lambda v: v['bandwidth'])
+        else:
+            try:
+                variant = playlist.best_variant(max_height=int(target_quality))
+            except ValueError:
+                return master_url
+                                                                                                                                             
+        if not variant: return master_url # Nothing fits the cap, let mpv decide
+        # A variant with separate audio renditions can't be played on its own
+        if variant['audio'] and any(m['uri'] for m in playlist.renditions('AUDIO', variant['audio'])):
             return master_url                                                                                                                
+        return variant['uri']
                                                                                                                                              
     # --- Scraper Logic ---                                                                                                                  
                                                                                                                                              
     def search(self, query):                                                                                                                 
+        """
+        Answers from the title index when an earlier search covers query,
+        refreshing it from the site in the background; otherwise searches the
+        site and indexes what it returns.
+        """
+        results = self.titles.lookup(query) if self.config.get("cache") else []
+        if results:
+            self.tracer.record({'stage': 'search', 'bytes': 0, 'cache': 'index'}, 0.0)
+            self.background(self.search_site, query)
+            return results
         self.notify(f"Searching: {Colors.BOLD}{query}{Colors.ENDC}")                                                                         
+        return self.search_site(query)
+
+    @traced("search")
+    def search_site(self, query):
+        """
+        Fetches the first results page, then up to search_pages - 1 more pages
+        concurrently, and merges them in page order without duplicates.
+        """
         search_query = query.replace(' ', '-')                                                                                               
-        soup = self.get_soup(f"/search/{search_query}")                                                                                      
-                                                                                                                                             
-        if not soup: return []                                                                                                               
+        results, last_page = self.search_page(search_query)
+        pages = range(2, min(last_page, self.config.get("search_pages")) + 1)
+        if pages:
+            with ThreadPoolExecutor(max_workers=len(pages)) as pool:
+                for more, _ in pool.map(lambda page: self.search_page(search_query, page), pages):
+                    results += more
+                                                                                                                                             
+        unique = {}
+        for r in results: unique.setdefault(r['id'], r)
+        unique = list(unique.values())
+        if unique: self.titles.add(query, unique)
+        return unique
+
+    def search_page(self, search_query, page=1):
+        """
+        Returns (results, number of the last page) for one page of results.
+        """
+        path = f"/search/{search_query}" + (f"?page={page}" if page > 1 else "")
+        nodes = self.select_page(path, [self.SEARCH_ITEMS, self.PAGE_LINKS])
+        if not nodes: return [], 1
+        items, links = nodes
+        last_page = max((int(m.group(1)) for m in (re.search(r'[?&]page=(\d+)', l['href']) for l in links) if m),
+                        default=1)
                                                                                                                                              
         results = []                                                                                                                         
-        for item in soup.find_all('div', class_='flw-item'):                                                                                 
+        for item in items:
             try:                                                                                                                             
                 link = item.find('a', href=True)                                                                                             
                 title_elem = link.get('title') if link else None                                                                             
@@ -238,7 +1653,7 @@ class StreamApp:
                 if media_id:                                                                                                                 
                     results.append({'title': title_elem, 'id': media_id, 'type': media_type, 'year': year})                                  
             except Exception: continue                                                                                                       
-        return results                                                                                                                       
+        return results, last_page
                                                                                                                                              
     def select_from_list(self, items, prompt="Select"):                                                                                      
         if not items: return None                                                                                                            
@@ -260,70 +1675,175 @@ class StreamApp:
             except ValueError: pass                                                                                                          
                                                                                                                                              
     def get_seasons(self, media_id):                                                                                                         
-        soup = self.get_soup(f"/ajax/v2/tv/seasons/{media_id}")                                                                              
-        if not soup: return []                                                                                                               
+        links = self.get_nodes(f"/ajax/v2/tv/seasons/{media_id}", self.LINKS)
+        if not links: return []
         seasons = []                                                                                                                         
-        for link in soup.find_all('a', href=True):                                                                                           
+        for link in links:
             sid = re.search(r'-(\d+)$', link['href'])                                                                                        
             if sid: seasons.append({'title': link.text.strip(), 'id': sid.group(1)})                                                         
         return seasons                                                                                                                       
                                                                                                                                              
     def get_episodes(self, season_id):                                                                                                       
-        soup = self.get_soup(f"/ajax/v2/season/episodes/{season_id}")                                                                        
-        if not soup: return []                                                                                                               
+        items = self.get_nodes(f"/ajax/v2/season/episodes/{season_id}", self.NAV_ITEMS)
+        if not items: return []
         episodes = []                                                                                                                        
-        for item in soup.find_all(class_='nav-item'):                                                                                        
+        for item in items:
             episodes.append({'title': item.get('title', '').strip(), 'data_id': item.get('data-id')})                                        
         return episodes                                                                                                                      
                                                                                                                                              
-    def get_source_id(self, episode_data_id):                                                                                                
-        soup = self.get_soup(f"/ajax/v2/episode/servers/{episode_data_id}")                                                                  
-        if not soup: return None                                                                                                             
-        preferred = self.config.get("provider").lower()                                                                                      
-        for item in soup.find_all(class_='nav-item'):                                                                                        
-            if preferred in item.get('title', '').lower():                                                                                   
-                return item.get('data-id')                                                                                                   
-        first = soup.find(class_='nav-item')                                                                                                 
-        if first: return first.get('data-id')                                                                                                
-        return None                                                                                                                          
-                                                                                                                                             
-    def get_movie_id(self, media_id):                                                                                                        
-        soup = self.get_soup(f"/ajax/movie/episodes/{media_id}")                                                                             
-        if not soup: return None                                                                                                             
-        preferred = self.config.get("provider").lower()                                                                                      
-        link = soup.find('a', href=True, title=re.compile(preferred, re.I))                                                                  
-        if not link: link = soup.find('a', href=True)                                                                                        
-        if link:                                                                                                                             
-            match = re.search(r'\.(\d+)$', link['href'])                                                                                     
-            return match.group(1) if match else None                                                                                         
-        return None                                                                                                                          
-                                                                                                                                             
-    def resolve_stream(self, source_id):                                                                                                     
+    def get_servers(self, episode_data_id):
+        items = self.get_nodes(f"/ajax/v2/episode/servers/{episode_data_id}", self.NAV_ITEMS)
+        if not items: return []
+        return [{'name': item.get('title', '').strip(), 'id': item.get('data-id')}
+                for item in items if item.get('data-id')]
+
+    def get_movie_servers(self, media_id):
+        links = self.get_nodes(f"/ajax/movie/episodes/{media_id}", self.LINKS)
+        if not links: return []
+        servers = []
+        for link in links:
+            match = re.search(r'\.(\d+)$', link['href'])
+            if match: servers.append({'name': link.get('title', '').strip(), 'id': match.group(1)})
+        return servers
+
+    def decrypt_sources(self, source_id, quiet=False, cancelled=None):
+        """
+        Returns the decrypted sources for source_id. A cached payload is reused
+        while its stream still answers; concurrent misses for the same id share
+        one trip to the sources and one to the decryption endpoint. Each caller
+        checks its own cancelled flag between the two, outside the shared calls.
+        """
+        data = self.cached_sources(source_id)
+        if data is not None: return data
+
+        embed_link = self.decrypt_flight.do(('sources', source_id), lambda: self.fetch_embed_link(source_id))
+        if not embed_link: return None
+        if cancelled and cancelled.is_set(): return None
+
+        data = self.decrypt_flight.do(('decrypt', source_id), lambda: self.fetch_decrypted(source_id, embed_link))
+        if data is None and not quiet: self.notify("Decryption API failed/down.", "Error")
+        return data
+
+    def cached_sources(self, source_id):
+        """
+        Returns the cached payload for source_id if its stream still answers,
+        dropping it from the cache if not.
+        """
+        if not self.config.get("cache"): return None
+        data = self.decrypt_cache.get(source_id)
+        if data is None: return None
+        if self.link_alive(self.stream_link(data)):
+            self.tracer.record({'stage': 'decrypt', 'bytes': 0, 'cache': 'hit', 'source_id': source_id}, 0.0)
+            return data
+        self.decrypt_cache.delete(source_id)
+        return None
+
+    def fetch_embed_link(self, source_id):
         # 1. Get Embed URL                                                                                                                   
         try:                                                                                                                                 
-            url = f"{self.config.get('base_url')}/ajax/episode/sources/{source_id}"                                                          
-            resp = self.session.get(url, timeout=10).json()                                                                                  
-            embed_link = resp.get('link', '')                                                                                                
-        except Exception: return None, None                                                                                                  
-                                                                                                                                             
-        if not embed_link: return None, None                                                                                                 
+            with self.tracer.span("sources", source_id=source_id):
+                resp = self.mirror_get('base', f"/ajax/episode/sources/{source_id}", 10).json()
+            return resp.get('link', '') or None
+        except Exception: return None
                                                                                                                                              
+    def fetch_decrypted(self, source_id, embed_link):
         # 2. Decrypt                                                                                                                         
         try:                                                                                                                                 
-            api_url = f"{self.config.get('api_url')}/?url={embed_link}"                                                                      
-            data = self.session.get(api_url, timeout=15).json()                                                                              
+            with self.tracer.span("decrypt", source_id=source_id, cache='miss'):
+                data = self.mirror_get('api', f"/?url={embed_link}", 15).json()
         except Exception:                                                                                                                    
-            self.notify("Decryption API failed/down.", "Error")                                                                              
-            return None, None                                                                                                                
-                                                                                                                                             
+            return None
+        if self.stream_link(data): self.decrypt_cache.put(source_id, data)
+        return data
+
+    @staticmethod
+    def stream_link(data):
+        if not isinstance(data, dict): return None
+        return next((s['file'] for s in data.get('sources', []) if '.m3u8' in s.get('file', '')), None)
+
+    def link_alive(self, url):
+        """
+        Cheap check that a cached stream link still answers, so an expired
+        one is re-resolved instead of being handed to mpv.
+        """
+        if not url: return False
+        try:
+            with self.tracer.span("probe"):
+                response = self.session.head(url, timeout=5, allow_redirects=True)
+                if response.status_code in (403, 405, 501): # Some CDNs refuse HEAD outright
+                    response = self.session.get(url, timeout=5, stream=True)
+                    response.close()
+            return response.status_code < 400
+        except requests.exceptions.RequestException:
+            return False
+
+    @traced("resolve_stream")
+    def resolve_stream(self, source_id):
+        data = self.decrypt_sources(source_id)
+        if data is None: return None, None
+        return self.select_stream(data)
+
+    @traced("resolve_stream")
+    def resolve_servers(self, servers):
+        """
+        Resolves a list of servers to a stream link and subtitles, applying the
+        quality and subtitle settings to the winning server's sources.
+        """
+        data = self.server_sources(servers)
+        if data is None: return None, None
+        return self.select_stream(data)
+
+    def server_sources(self, servers):
+        """
+        Returns the decrypted sources of the first server to yield an m3u8,
+        trying them fastest-first by past performance. With race_servers on
+        they all run concurrently and the rest are abandoned.
+        """
+        ranked = self.server_stats.rank(servers, self.config.get("provider"))
+        if not ranked: return None
+
+        # A warm cache answers after one probe rather than one per raced server
+        for server in ranked:
+            data = self.cached_sources(server['id'])
+            if data: return data
+
+        if not self.config.get("race_servers"):
+            for server in ranked:
+                data = self.try_server(server)
+                if data: return data
+            return None
+                                                                                                                                             
+        cancelled = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=len(ranked))
+        futures = [pool.submit(self.try_server, s, cancelled) for s in ranked]
+        winner = None
+        try:
+            for future in as_completed(futures):
+                winner = future.result()
+                if winner: break
+        finally:
+            cancelled.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+        return winner
+
+    def try_server(self, server, cancelled=None):
+        start = time.time()
+        data = self.decrypt_sources(server['id'], quiet=True, cancelled=cancelled)
+        if cancelled and cancelled.is_set() and data is None: return None # Lost the race; not a failure
+        ok = bool(self.stream_link(data))
+        self.server_stats.record(server['name'], time.time() - start, ok)
+        return data if ok else None
+
+    def select_stream(self, data):
         # 3. Find m3u8                                                                                                                       
-        video_link = next((s['file'] for s in data.get('sources', []) if '.m3u8' in s.get('file', '')), None)                                
+        video_link = self.stream_link(data)
                                                                                                                                              
         if video_link:                                                                                                                       
             # 4. Enforce Quality                                                                                                             
             quality_setting = self.config.get("quality")                                                                                     
             if quality_setting != "Best":                                                                                                    
-                self.notify(f"Selecting stream for quality: {quality_setting}p...", "Info")                                                  
+                label = quality_setting if quality_setting == "Auto" else f"{quality_setting}p"
+                self.notify(f"Selecting stream for quality: {label}...", "Info")
                 video_link = self.enforce_quality(video_link, quality_setting)                                                               
                                                                                                                                              
         # 5. Find Subs                                                                                                                       
@@ -333,23 +1853,323 @@ class StreamApp:
                                                                                                                                              
         return video_link, subs                                                                                                              
                                                                                                                                              
-    def play(self, url, subs, title):                                                                                                        
+    def ipc_player(self):
+        """
+        Returns the shared mpv IPC player, starting mpv if needed, or None when
+        IPC playback is disabled or unavailable on this platform.
+        """
+        if not self.config.get("mpv_ipc") or os.name == 'nt' or not hasattr(socket, 'AF_UNIX'):
+            return None
+        if not self.player: self.player = MpvPlayer(tracer=self.tracer)
+        try:
+            if not self.player.running():
+                with self.tracer.span("mpv_launch"):
+                    self.player.start(self.config.get("mpv_options").split())
+        except OSError as e:
+            self.notify(f"mpv IPC unavailable ({e}), falling back to one process per file.", "Error")
+            self.player.close()
+            return None
+        return self.player
+
+    def stop_player(self):
+        if self.player: self.player.close()
+
+    def save_state(self):
+        # Stats gathered during playback and resolution, written while idle
+        self.server_stats.flush()
+        self.mirror_health.flush()
+
+    def local_subs(self, subs):
+        """
+        Swaps subtitle URLs for cached local copies, downloading missing ones
+        concurrently for at most subs_wait seconds. Tracks that miss the
+        deadline stay remote and mpv fetches them itself.
+        """
+        urls = [s for s in subs or [] if s.startswith('http')]
+        if not urls: return subs
+        with self.tracer.span("subtitles", tracks=len(urls)):
+            found = self.subtitles.fetch(self.session, urls, self.config.get("subs_wait"))
+        return [found.get(s, s) for s in subs]
+
+    def play(self, url, subs, title, start=None):
+        """
+        Plays url from start seconds and blocks until it ends. Returns mpv's
+        end-file reason and the last playback position.
+        """
+        subs = self.local_subs(subs)
         self.notify(f"Playing: {title}", "Success")                                                                                          
+        player = self.ipc_player()
+        if player:
+            player.load(url, subs, title, start=start)
+            reason = player.wait()
+            return reason, player.position
+
         cmd = ["mpv", url, f"--force-media-title={title}"]                                                                                   
         opts = self.config.get("mpv_options").split()                                                                                        
         if opts: cmd.extend(opts)                                                                                                            
         if subs:                                                                                                                             
             for s in subs: cmd.append(f"--sub-file={s}")                                                                                     
-        subprocess.run(cmd, stderr=subprocess.DEVNULL)                                                                                       
-                                                                                                                                             
+        # mpv only writes watch-later state when it is quit mid-file
+        cmd += ["--save-position-on-quit", f"--watch-later-directory={self.WATCH_LATER_DIR}"]
+        if start: cmd.append(f"--start={start:.0f}")
+        with self.tracer.span("play"):
+            proc = subprocess.run(cmd, stderr=subprocess.DEVNULL)
+        position = self.watch_later_position(url)
+        if proc.returncode == 2: return 'error', position
+        return ('quit' if position is not None else 'eof'), position
+
+    def watch_later_position(self, url):
+        """
+        Reads and removes the position mpv saved for url on quit. mpv names
+        the file after the upper-case MD5 of the path it played.
+        """
+        path = os.path.join(self.WATCH_LATER_DIR, hashlib.md5(url.encode()).hexdigest().upper())
+        try:
+            with open(path, 'r') as f:
+                lines = f.read().splitlines()
+            os.remove(path)
+        except OSError:
+            return None
+        for line in lines:
+            if line.startswith("start="):
+                try: return float(line[6:])
+                except ValueError: return None
+        return None
+                                                                                                                                             
+    # --- Prefetch ---
+
+    def resolve_episode(self, episode):
+        servers = self.get_servers(episode['data_id'])
+        link, subs = self.resolve_servers(servers)
+        return {'servers': servers, 'link': link, 'subs': subs, 'time': time.time()}
+
+    def resolve_movie(self, media):
+        servers = self.get_movie_servers(media['id'])
+        link, subs = self.resolve_servers(servers)
+        return {'servers': servers, 'link': link, 'subs': subs, 'time': time.time()}
+
+    def prefetch_episode(self, episode):
+        """
+        Starts resolving an episode on a worker thread so the result is ready
+        by the time the current one finishes playing.
+        """
+        if not self.config.get("prefetch"): return None
+
+        def job():
+            result = self.resolve_episode(episode)
+            result['subs'] = self.local_subs(result['subs'])
+            return result
+        return self.background(job)
+
+    def take_prefetched(self, future, episode, resolve=None):
+        """
+        Returns the prefetched result for episode, re-resolving it if the
+        prefetch failed or the link is older than prefetch_ttl.
+        """
+        if future:
+            try:
+                result = future.result()
+                age = time.time() - result['time']
+                if result['link'] and age < self.config.get("prefetch_ttl"):
+                    return result
+            except Exception: pass
+        return (resolve or self.resolve_episode)(episode)
+
+    # --- Season Playlists ---
+
+    def resolve_season(self, episodes):
+        """
+        Resolves every episode concurrently, at most resolve_workers at a time
+        and resolve_rate per second, and yields (episode, result) in episode
+        order as soon as each one and everything before it is done. A failed
+        episode yields a result without a link instead of ending the walk.
+        """
+        limiter = RateLimiter(self.config.get("resolve_rate"))
+
+        def job(ep):
+            limiter.acquire()
+            return self.resolve_episode(ep)
+
+        pool = ThreadPoolExecutor(max_workers=max(1, self.config.get("resolve_workers")))
+        futures = [pool.submit(job, ep) for ep in episodes]
+        try:
+            for ep, future in zip(episodes, futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'servers': None, 'link': None, 'subs': [], 'time': time.time(), 'error': str(e)}
+                yield ep, result
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def file_name(title):
+        return re.sub(r'[\\/:*?"<>|]+', '_', title).strip()
+
+    @staticmethod
+    def write_playlist(path, entries):
+        """
+        Writes (title, link, subs) entries as an extended M3U. Subtitles go in
+        #EXTVLCOPT:sub-file lines, which VLC honours and mpv skips as comments.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("#EXTM3U\n")
+            for title, link, subs in entries:
+                f.write(f"#EXTINF:-1,{title}\n")
+                for sub in subs or []: f.write(f"#EXTVLCOPT:sub-file={sub}\n")
+                f.write(f"{link}\n")
+
+    def play_playlist(self, entries):
+        """
+        Plays (title, link, subs) entries back to back with their subtitles,
+        queued over IPC or as per-file option groups on one mpv command line.
+        """
+        subs = [s for _, _, track in entries for s in track or []]
+        local = dict(zip(subs, self.local_subs(subs)))
+        entries = [(title, link, [local[s] for s in track or []]) for title, link, track in entries]
+        self.notify(f"Playing {len(entries)} episodes", "Success")
+        player = self.ipc_player()
+        if player:
+            for idx, (title, link, subs) in enumerate(entries):
+                player.load(link, subs, title, append=idx > 0)
+            for _ in entries:
+                if player.wait() == 'quit': break
+            return
+
+        cmd = ["mpv", *self.config.get("mpv_options").split()]
+        for title, link, subs in entries:
+            cmd += ["--{", link, f"--force-media-title={title}", *(f"--sub-file={s}" for s in subs or []), "--}"]
+        with self.tracer.span("play"):
+            subprocess.run(cmd, stderr=subprocess.DEVNULL)
+
+    def handle_season_playlist(self, media):
+        if media['type'] == 'Movie': return self.notify("Season playlists are only available for TV shows", "Error")
+        season = self.select_from_list(self.get_seasons(media['id']), "Select Season")
+        if not season: return
+        episodes = self.get_episodes(season['id'])
+        if not episodes: return self.notify("No episodes found", "Error")
+
+        self.notify(f"Resolving {len(episodes)} episodes...", "Info")
+        start = time.time()
+        entries = []
+        for n, (ep, result) in enumerate(self.resolve_season(episodes), 1):
+            progress = f"[{n}/{len(episodes)}] {ep['title']}"
+            if result['link']:
+                entries.append((f"{media['title']} - {season['title']} - {ep['title']}", result['link'], result['subs']))
+                self.notify(progress, "Success")
+            elif not result['servers']:
+                self.notify(f"{progress}: {result.get('error', 'Server ID not found')}", "Error")
+            else:
+                self.notify(f"{progress}: stream not found", "Error")
+        if not entries: return self.notify("No episodes could be resolved", "Error")
+
+        path = os.path.join(self.config.get("playlist_dir"), self.file_name(f"{media['title']} - {season['title']}") + ".m3u")
+        self.write_playlist(path, entries)
+        self.notify(f"Wrote {path} ({len(entries)}/{len(episodes)} episodes in {time.time() - start:.1f}s)", "Success")
+
+        choice = input(f"\n{Colors.CYAN}Play it now? [Y/n]: {Colors.ENDC}").strip().lower()
+        if choice == 'n': return
+        self.play_playlist(entries)
+        self.stop_player()
+
+    # --- Downloads ---
+
+    def download(self, link, title, limiter=None, show_progress=True):
+        """
+        Downloads the HLS variant behind link to download_dir and returns the
+        local path, or None on failure.
+        """
+        playlist, variant = self.fetch_playlist(link), None
+        if playlist and playlist.is_master:
+            variant = playlist.best_variant()
+            if variant['audio'] and any(m['uri'] for m in playlist.renditions('AUDIO', variant['audio'])):
+                self.notify(f"{title}: separate audio tracks are not supported for download", "Error")
+                return None
+            playlist = self.fetch_playlist(variant['uri'])
+        if not playlist or not playlist.segments:
+            self.notify(f"{title}: no segments found", "Error")
+            return None
+        if any(s['key'] for s in playlist.segments):
+            self.notify(f"{title}: encrypted streams are not supported for download", "Error")
+            return None
+
+        ext = ".mp4" if playlist.segments[0]['map'] else ".ts"
+        path = os.path.join(self.config.get("download_dir"), self.file_name(title) + ext)
+
+        def progress(done, total, size, elapsed):
+            rate = size / 1e6 / elapsed if elapsed else 0.0
+            print(f"\r{Colors.CYAN}[*] {done}/{total} segments, {size / 1e6:.1f} MB, {rate:.2f} MB/s{Colors.ENDC}",
+                  end='', flush=True)
+
+        downloader = HlsDownloader(self.session, playlist, path, self.config.get("download_workers"), limiter, variant)
+        ok = downloader.run(progress if show_progress else None)
+        if show_progress and downloader.bytes: print()
+        if not ok:
+            self.notify(f"{title}: download interrupted, run it again to resume", "Error")
+            return None
+        self.notify(f"Saved {path} ({downloader.bytes / 1e6:.1f} MB at {downloader.rate:.2f} MB/s)", "Success")
+        return path
+
+    def download_season(self, media, season, episodes):
+        """
+        Resolves and downloads several episodes at once. All segment fetches
+        share one semaphore, so download_workers caps the whole season.
+        """
+        limiter = threading.BoundedSemaphore(self.config.get("download_workers"))
+        start = time.time()
+
+        def job(ep):
+            title = f"{media['title']} - {season['title']} - {ep['title']}"
+            link, _ = self.resolve_servers(self.get_servers(ep['data_id']))
+            if not link:
+                self.notify(f"{title}: stream not found", "Error")
+                return None
+            return self.download(link, title, limiter, show_progress=False)
+
+        with ThreadPoolExecutor(max_workers=self.DOWNLOAD_EPISODES) as pool:
+            paths = [p for p in pool.map(job, episodes) if p]
+
+        size = sum(os.path.getsize(p) for p in paths)
+        elapsed = time.time() - start
+        self.notify(f"Downloaded {len(paths)}/{len(episodes)} episodes, {size / 1e6:.1f} MB "
+                    f"({size / 1e6 / elapsed:.2f} MB/s overall)", "Success")
+
+    def handle_download(self, media):
+        if media['type'] == 'Movie':
+            link, subs = self.resolve_servers(self.get_movie_servers(media['id']))
+            if not link: return self.notify("Stream resolution failed", "Error")
+            path = self.download(link, media['title'])
+            if path: self.play(path, subs, media['title'])
+            return self.stop_player()
+
+        season = self.select_from_list(self.get_seasons(media['id']), "Select Season")
+        if not season: return
+        episodes = self.get_episodes(season['id'])
+        if not episodes: return self.notify("No episodes found", "Error")
+
+        choice = input(f"\n{Colors.CYAN}Download whole season? [y/N]: {Colors.ENDC}").strip().lower()
+        if choice == 'y': return self.download_season(media, season, episodes)
+
+        ep = self.select_from_list(episodes, "Select Episode")
+        if not ep: return
+        title = f"{media['title']} - {season['title']} - {ep['title']}"
+        link, subs = self.resolve_servers(self.get_servers(ep['data_id']))
+        if not link: return self.notify("Stream not found", "Error")
+        path = self.download(link, title)
+        if path: self.play(path, subs, title)
+        self.stop_player()
+
     # --- Handlers ---                                                                                                                       
                                                                                                                                              
-    def handle_movie(self, media):                                                                                                           
-        eid = self.get_movie_id(media['id'])                                                                                                 
-        if not eid: return self.notify("Movie source not found", "Error")                                                                    
-        link, subs = self.resolve_stream(eid)                                                                                                
-        if link: self.play(link, subs, media['title'])                                                                                       
+    def handle_movie(self, media, start=None, pending=None):
+        result = self.take_prefetched(pending, media, self.resolve_movie)
+        if not result['servers']: return self.notify("Movie source not found", "Error")
+        if result['link']:
+            reason, position = self.play(result['link'], result['subs'], media['title'], start)
+            self.history.record(media, position=position, finished=reason == 'eof')
         else: self.notify("Stream resolution failed", "Error")                                                                               
+        self.stop_player()
                                                                                                                                              
     def handle_tv(self, media):                                                                                                              
         seasons = self.get_seasons(media['id'])                                                                                              
@@ -366,27 +2186,63 @@ class StreamApp:
             start_index = next(i for i, v in enumerate(episodes) if v['data_id'] == first_ep['data_id'])                                     
         except StopIteration: return                                                                                                         
                                                                                                                                              
+        self.watch_season(media, season, episodes, start_index)
+
+    def watch_season(self, media, season, episodes, start_index, start=None, pending=None):
+        """
+        Plays episodes from start_index on, the first one from start seconds,
+        recording each one in the watch history as it ends.
+        """
+        upcoming = None   # Next episode, resolved early so it can be queued in mpv
+        queued = False    # Whether upcoming is already in mpv's playlist
         for i in range(start_index, len(episodes)):                                                                                          
             ep = episodes[i]                                                                                                                 
             title = f"{media['title']} - {season['title']} - {ep['title']}"                                                                  
-                                                                                                                                             
-            self.notify(f"Loading: {title}...", "Info")                                                                                      
-            sid = self.get_source_id(ep['data_id'])                                                                                          
-            if not sid:                                                                                                                      
+            offset = start if i == start_index else None
+                                                                                                                                             
+            if upcoming:
+                result, upcoming = upcoming, None
+            else:
+                self.notify(f"Loading: {title}...", "Info")
+                result = self.take_prefetched(pending, ep)
+                pending = None
+            if not result['servers']:
                 self.notify("Server ID not found", "Error")                                                                                  
                 break                                                                                                                        
                                                                                                                                              
-            link, subs = self.resolve_stream(sid)                                                                                            
-            if link:                                                                                                                         
-                self.play(link, subs, title)                                                                                                 
+            # Resolve the next episode while this one plays
+            if i + 1 < len(episodes):
+                pending = self.prefetch_episode(episodes[i + 1])
+
+            player = self.ipc_player() if result['link'] and self.config.get("autoplay") else None
+            if player:
+                self.notify(f"Playing: {title}", "Success")
+                if not queued: player.load(result['link'], self.local_subs(result['subs']), title, start=offset)
+                queued = False
+                if i + 1 < len(episodes):
+                    # Append the next episode so mpv rolls straight into it
+                    upcoming = self.take_prefetched(pending, episodes[i + 1])
+                    pending = None
+                    if upcoming['link']:
+                        next_title = f"{media['title']} - {season['title']} - {episodes[i + 1]['title']}"
+                        player.load(upcoming['link'], self.local_subs(upcoming['subs']), next_title, append=True)
+                        queued = True
+                reason = player.wait()
+                self.history.record(media, season, ep, player.position, reason == 'eof')
+                # Anything but a natural end drops the rest of mpv's playlist
+                if reason != 'eof' or not player.running(): queued = False
+            elif result['link']:
+                reason, position = self.play(result['link'], result['subs'], title, offset)
+                self.history.record(media, season, ep, position, reason == 'eof')
             else:                                                                                                                            
                 self.notify("Stream not found", "Error")                                                                                     
                                                                                                                                              
             if self.config.get("autoplay"):                                                                                                  
                 if i + 1 < len(episodes):                                                                                                    
+                    if queued: continue # mpv is already playing it
                     print(f"\n{Colors.GREEN}Autoplaying next in 3s... (Ctrl+C to cancel){Colors.ENDC}")                                      
                     try:                                                                                                                     
-                        subprocess.run(["sleep", "3"])                                                                                       
+                        time.sleep(3)
                     except KeyboardInterrupt:                                                                                                
                         break                                                                                                                
                 else:                                                                                                                        
@@ -398,18 +2254,108 @@ class StreamApp:
                     if choice == 'n': break                                                                                                  
                 else: break                                                                                                                  
                                                                                                                                              
+        if pending: pending.cancel()
+        self.stop_player()
+
+    # --- Continue Watching ---
+
+    def plan_resume(self):
+        """
+        Works out where 'continue' picks up from the newest history entry: the
+        same episode at its saved position, or the next one (rolling over into
+        the next season) if it was finished. The stream is resolved in the
+        background straight away so resuming starts without waiting on it.
+        Returns None when there is nothing left to continue.
+        """
+        entry = self.history.last()
+        if not entry: return None
+        media, season = entry['media'], entry['season']
+        position = entry['position'] if not entry['finished'] else None
+        start = max(0, position - self.RESUME_REWIND) if position else None
+        plan = {'entry': entry, 'media': media, 'start': start}
+
+        if media['type'] == 'Movie':
+            if entry['finished']: return None
+            pending = self.background(self.resolve_movie, media) if self.config.get("prefetch") else None
+            return {**plan, 'pending': pending}
+
+        if not season or not entry['episode']: return None
+        episodes = self.get_episodes(season['id'])
+        index = next((i for i, e in enumerate(episodes) if e['data_id'] == entry['episode']['data_id']), None)
+        if index is None: return None
+        if entry['finished']:
+            index += 1
+            if index >= len(episodes):
+                seasons = self.get_seasons(media['id'])
+                current = next((i for i, s in enumerate(seasons) if s['id'] == season['id']), None)
+                if current is None or current + 1 >= len(seasons): return None
+                season, index = seasons[current + 1], 0
+                episodes = self.get_episodes(season['id'])
+                if not episodes: return None
+
+        return {**plan, 'season': season, 'episodes': episodes, 'index': index,
+                'pending': self.prefetch_episode(episodes[index])}
+
+    def describe_plan(self, plan):
+        text = plan['media']['title']
+        if 'season' in plan:
+            text += f" - {plan['season']['title']} - {plan['episodes'][plan['index']]['title']}"
+        if plan['start']:
+            minutes, seconds = divmod(int(plan['start']), 60)
+            text += f" from {minutes // 60}:{minutes % 60:02d}:{seconds:02d}"
+        return text
+
+    def continue_watching(self):
+        plan = None
+        if self.resume:
+            try: plan = self.resume.result()
+            except Exception: pass
+            self.resume = None
+        # The startup plan is stale once anything else has been watched
+        if not plan or plan['entry'] is not self.history.last():
+            if plan and plan['pending']: plan['pending'].cancel()
+            plan = self.plan_resume()
+        if not plan: return self.notify("Nothing to continue", "Info")
+
+        self.notify(f"Continuing: {self.describe_plan(plan)}", "Info")
+        if 'season' in plan:
+            self.watch_season(plan['media'], plan['season'], plan['episodes'], plan['index'],
+                              plan['start'], plan['pending'])
+        else:
+            self.handle_movie(plan['media'], plan['start'], plan['pending'])
+
     def run(self):                                                                                                                           
         print(f"\n{Colors.HEADER} Stream Movie{Colors.ENDC}")                                                                                
+        self.background(self.warm_up)
+        last = self.history.last()
+        if last:
+            # Resolve the likely next watch while the prompt is idle
+            self.resume = self.background(self.plan_resume)
+            where = f" - {last['episode']['title']}" if last['episode'] else ""
+            print(f"{Colors.CYAN}Last watched: {last['media']['title']}{where} ('c' to continue){Colors.ENDC}")
         while True:                                                                                                                          
             try:                                                                                                                             
-                q = input(f"\n{Colors.BLUE}Search/Command ('s' settings, 'q' quit): {Colors.ENDC}").strip()                                  
+                if self.startup is not None: self.startup.setdefault('prompt', time.perf_counter() - STARTED)
+                self.save_state()
+                hint = "'c' continue, " if self.history.last() else ""
+                q = input(f"\n{Colors.BLUE}Search/Command ({hint}'s' settings, ':d <title>' download, ':r <title>' season playlist, 'q' quit): {Colors.ENDC}").strip()
                 if q.lower() in ['q', 'exit']: break                                                                                         
                 if q.lower() in ['s', 'settings']:                                                                                           
                     self.settings_menu()                                                                                                     
                     continue                                                                                                                 
+                if q.lower() in ['c', 'continue']:
+                    self.continue_watching()
+                    continue                                                                                                                 
+                # Prefixed with ':' so searches like "D Day" aren't taken as commands
+                mode = q[1].lower() if q[:3].lower() in [':d ', ':r '] else None
+                if mode: q = q[3:].strip()
                 if not q: continue                                                                                                           
                                                                                                                                              
+                searched = time.perf_counter()
                 results = self.search(q)                                                                                                     
+                if self.startup is not None and 'result' not in self.startup:
+                    self.startup.update(result=time.perf_counter() - STARTED, search=time.perf_counter() - searched,
+                                        warmed=self.warmed)
                 if not results:                                                                                                              
                     self.notify("No results found", "Info")                                                                                  
                     continue                                                                                                                 
@@ -417,14 +2363,238 @@ class StreamApp:
                 media = self.select_from_list(results, "Select Media")                                                                       
                 if not media: continue                                                                                                       
                                                                                                                                              
-                if media['type'] == 'Movie': self.handle_movie(media)                                                                        
+                if mode == 'd': self.handle_download(media)
+                elif mode == 'r': self.handle_season_playlist(media)
+                elif media['type'] == 'Movie': self.handle_movie(media)
                 else: self.handle_tv(media)                                                                                                  
             except KeyboardInterrupt:                                                                                                        
                 print("\nStopped.")                                                                                                          
                 break                                                                                                                        
             except Exception as e:                                                                                                           
                 self.notify(f"Error: {e}", "Error")                                                                                          
+        self.config.flush()
+        self.save_state()
+        self.report_startup()
+        self.report_profile()
+
+    def report_startup(self):
+        if not self.startup: return
+        print(f"\n{Colors.HEADER}--- Startup ---{Colors.ENDC}")
+        print(f"Time to prompt:       {self.startup['prompt'] * 1000:8.1f} ms")
+        if 'result' in self.startup:
+            print(f"Time to first result: {self.startup['result'] * 1000:8.1f} ms "
+                  f"(search {self.startup['search'] * 1000:.1f} ms, warm-up {'done' if self.startup['warmed'] else 'unfinished'})")
+
+    def report_profile(self):
+        if not self.tracer.records: return
+        print(f"\n{Colors.HEADER}--- Profile ({self.tracer.path}) ---{Colors.ENDC}")
+        for line in self.tracer.summary(): print(line)
+
+# --- Resolver Daemon ---
+
+class ResolverServer:
+    """
+    Serves search, seasons, episodes, servers and stream resolution as JSON
+    over HTTP from one StreamApp, so several front-ends share its connection
+    pool, caches and server stats. Identical in-flight requests are collapsed
+    into one upstream call.
+
+        GET  /search?q=<query>
+        GET  /seasons?id=<media_id>
+        GET  /episodes?id=<season_id>
+        GET  /servers?id=<episode_data_id>
+        GET  /movie_servers?id=<media_id>
+        POST /resolve  {"servers": [...]} or {"source_id": "..."}
+
+    /resolve answers with the decrypted sources rather than a chosen link, so
+    each client applies its own quality and subtitle settings.
+    """
+    # Seconds a result is reused for identical requests. Resolutions are only
+    # collapsed while in flight: the app's decryption cache already keeps them
+    # for as long as their expiry token allows and probes them before reuse.
+    TTLS = {'search': 600, 'seasons': 3600, 'episodes': 3600, 'servers': 600, 'movie_servers': 600, 'resolve': 0}
+    SAVE_INTERVAL = 60  # Seconds between writes of the app's stats files
+
+    def __init__(self, app, host="127.0.0.1", port=8765):
+        self.app = app
+        self.flight = SingleFlight()
+        self.results = {}
+        self.lock = threading.Lock()
+
+        # One pooled session for every client thread
+        adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=32)
+        app.session.mount("http://", adapter)
+        app.session.mount("https://", adapter)
+
+        server = self
+        class Handler(http_server.BaseHTTPRequestHandler):
+            def log_message(self, fmt, *args): pass
+            def do_GET(self): server.handle(self, None)
+            def do_POST(self):
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    body = json.loads(self.rfile.read(length) or b'{}') if length >= 0 else None
+                except ValueError:
+                    body = None
+                server.handle(self, body)
+
+        self.httpd = http_server.ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    def routes(self, endpoint, params, body):
+        """
+        Returns (cache key, callable) for a request, or None if it is unknown.
+        """
+        arg = params.get('q' if endpoint == 'search' else 'id', [None])[0]
+        if endpoint == 'search' and arg: return arg.lower(), lambda: self.app.search(arg)
+        if endpoint == 'seasons' and arg: return arg, lambda: self.app.get_seasons(arg)
+        if endpoint == 'episodes' and arg: return arg, lambda: self.app.get_episodes(arg)
+        if endpoint == 'servers' and arg: return arg, lambda: self.app.get_servers(arg)
+        if endpoint == 'movie_servers' and arg: return arg, lambda: self.app.get_movie_servers(arg)
+        if endpoint == 'resolve' and isinstance(body, dict):
+            servers, source_id = body.get('servers'), body.get('source_id')
+            if servers and self.valid_servers(servers):
+                key = json.dumps(sorted(s['id'] for s in servers))
+                return key, lambda: {'sources': self.app.server_sources(servers)}
+            if source_id and isinstance(source_id, str):
+                return source_id, lambda: {'sources': self.app.decrypt_sources(source_id)}
+        return None
+
+    @staticmethod
+    def valid_servers(servers):
+        return isinstance(servers, list) and all(
+            isinstance(s, dict) and isinstance(s.get('id'), str) and isinstance(s.get('name'), str) for s in servers)
+
+    def call(self, endpoint, key, fn):
+        cache_key = (endpoint, key)
+        with self.lock:
+            hit = self.results.get(cache_key)
+        if hit and time.time() < hit[0]: return hit[1]
+
+        result = self.flight.do(cache_key, fn)
+        # Empty listings are worth retrying
+        if result and self.TTLS[endpoint]:
+            now = time.time()
+            with self.lock:
+                self.results = {k: v for k, v in self.results.items() if v[0] > now}
+                self.results[cache_key] = (now + self.TTLS[endpoint], result)
+        return result
+
+    def handle(self, req, body):
+        url = urlparse(req.path)
+        endpoint = url.path.strip('/')
+        if endpoint == 'health': return self.respond(req, 200, {'ok': True})
+        if endpoint not in self.TTLS: return self.respond(req, 404, {'error': 'not found'})
+
+        try:
+            route = self.routes(endpoint, parse_qs(url.query), body)
+            if not route: return self.respond(req, 400, {'error': 'bad request'})
+            self.respond(req, 200, self.call(endpoint, *route))
+        except Exception as e:
+            self.respond(req, 500, {'error': str(e)})
+
+    @staticmethod
+    def respond(req, status, payload):
+        data = json.dumps(payload).encode()
+        req.send_response(status)
+        req.send_header('Content-Type', 'application/json')
+        req.send_header('Content-Length', str(len(data)))
+        req.end_headers()
+        req.wfile.write(data)
+
+    def serve_forever(self):
+        host, port = self.httpd.server_address[:2]
+        self.app.notify(f"Resolver listening on http://{host}:{port}", "Success")
+        self.app.background(self.app.warm_up)
+        stopped = threading.Event()
+        threading.Thread(target=self.save_loop, args=(stopped,), daemon=True).start()
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopped.")
+        finally:
+            stopped.set()
+            self.httpd.server_close()
+            self.app.save_state()
+
+    def save_loop(self, stopped):
+        while not stopped.wait(self.SAVE_INTERVAL):
+            self.app.save_state()
+
+class RemoteStreamApp(StreamApp):
+    """
+    Thin client for a ResolverServer: scraping and resolution are delegated
+    to the daemon, playback and menus stay local.
+    """
+
+    def __init__(self, remote, trace_file=None, config=None, time_startup=False):
+        super().__init__(trace_file, config, time_startup)
+        self.remote = remote.rstrip('/')
+
+    def call_remote(self, path, default, body=None):
+        try:
+            url = f"{self.remote}{path}"
+            with self.tracer.span("remote", path=urlparse(url).path):
+                if body is None: response = self.session.get(url, timeout=60)
+                else: response = self.session.post(url, json=body, timeout=60)
+            response.raise_for_status()
+            return response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.notify(f"Resolver error: {e}", "Error")
+            return default
+
+    def warm_up(self):
+        # Only the resolver is contacted in this mode
+        with self.tracer.span("warm_up"):
+            try:
+                self.session.get(f"{self.remote}/health", timeout=self.PROBE_TIMEOUT)
+            except requests.exceptions.RequestException: pass
+        self.warmed = True
+
+    def search(self, query):
+        self.notify(f"Searching: {Colors.BOLD}{query}{Colors.ENDC}")
+        return self.call_remote(f"/search?{urlencode({'q': query})}", [])
+
+    def get_seasons(self, media_id):
+        return self.call_remote(f"/seasons?id={media_id}", [])
+
+    def get_episodes(self, season_id):
+        return self.call_remote(f"/episodes?id={season_id}", [])
+
+    def get_servers(self, episode_data_id):
+        return self.call_remote(f"/servers?id={episode_data_id}", [])
+
+    def get_movie_servers(self, media_id):
+        return self.call_remote(f"/movie_servers?id={media_id}", [])
+
+    # Quality and subtitles are chosen locally by select_stream from these
+    def server_sources(self, servers):
+        if not servers: return None
+        return self.call_remote("/resolve", {}, {'servers': servers}).get('sources')
+
+    def decrypt_sources(self, source_id, quiet=False, cancelled=None):
+        return self.call_remote("/resolve", {}, {'source_id': source_id}).get('sources')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Search and stream movies and TV shows with mpv.")
+    parser.add_argument("command", nargs="?", choices=["serve"],
+                        help="serve: run a resolver that other instances can use with --remote")
+    parser.add_argument("--profile", nargs="?", const=Tracer.FILE_NAME, metavar="FILE",
+                        help=f"trace stage timings to FILE (default {Tracer.FILE_NAME}) and print a summary on exit")
+    parser.add_argument("--time-startup", action="store_true",
+                        help="report time to the first prompt and to the first search result on exit")
+    parser.add_argument("--host", default="127.0.0.1", help="address for serve to listen on (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port for serve to listen on (default 8765)")
+    parser.add_argument("--remote", metavar="URL", help="scrape and resolve through a resolver at URL")
+    return parser.parse_args()
                                                                                                                                              
 if __name__ == "__main__":                                                                                                                   
+    args = parse_args()
+    if args.command == "serve":
+        ResolverServer(StreamApp(trace_file=args.profile), args.host, args.port).serve_forever()
+        sys.exit(0)
     check_dependencies()                                                                                                                     
-    StreamApp().run()                                                                                                                       
+    config = Config()
+    remote = args.remote or config.get("remote")
+    if remote: RemoteStreamApp(remote, trace_file=args.profile, config=config, time_startup=args.time_startup).run()
+    else: StreamApp(trace_file=args.profile, config=config, time_startup=args.time_startup).run()
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from stream import DecryptCache
+
+@pytest.fixture
+def cache():
+    cache = DecryptCache(default_ttl=1800)
+    yield cache
+    cache.db.close()
+
+def payload(url):
+    return {'sources': [{'file': url}], 'tracks': []}
+
+def test_expiry_tokens():
+    now = int(time.time())
+    assert DecryptCache.expiry(f"https://cdn/a/master.m3u8?exp={now + 600}") == now + 600
+    assert DecryptCache.expiry(f"https://cdn/a/master.m3u8?x=1&expires={(now + 600) * 1000}") == now + 600
+    assert DecryptCache.expiry(f"https://cdn/e/{now + 300}/a/master.m3u8") == now + 300
+    assert DecryptCache.expiry(f"https://cdn/a.m3u8?validto={now + 900}&e={now + 400}") == now + 400
+    assert DecryptCache.expiry("https://cdn/a/master.m3u8") is None
+
+def test_amz_signature_expiry():
+    signed = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(time.time() - 60))
+    expiry = DecryptCache.expiry(f"https://s3/a.m3u8?X-Amz-Date={signed}&X-Amz-Expires=3600")
+    assert expiry == pytest.approx(time.time() + 3540, abs=2)
+
+def test_ids_far_from_now_are_not_expiries():
+    now = int(time.time())
+    assert DecryptCache.expiry(f"https://cdn/a.m3u8?e={now + 90 * 86400}") is None
+    assert DecryptCache.expiry("https://cdn/a.m3u8?e=1000000000") is None
+
+def test_expired_token_is_still_an_expiry(cache):
+    url = f"https://cdn/a.m3u8?exp={int(time.time()) - 100}"
+    assert DecryptCache.expiry(url) == int(time.time()) - 100
+    assert cache.ttl_for(payload(url)) <= 0
+
+def test_ttl_for(cache):
+    now = time.time()
+    assert cache.ttl_for(payload("https://cdn/a.m3u8")) == 1800
+    ttl = cache.ttl_for(payload(f"https://cdn/a.m3u8?exp={int(now) + 600}"))
+    assert ttl == pytest.approx(600 - DecryptCache.EXPIRY_MARGIN, abs=2)
+
+def test_put_and_get(cache):
+    cache.put("1", payload("https://cdn/a.m3u8"))
+    assert cache.get("1") == payload("https://cdn/a.m3u8")
+    cache.delete("1")
+    assert cache.get("1") is None
+
+def test_expired_payloads_are_not_stored(cache):
+    cache.put("1", payload(f"https://cdn/a.m3u8?exp={int(time.time()) - 100}"))
+    cache.put("2", payload(f"https://cdn/a.m3u8?exp={int(time.time()) + 30}")) # Inside EXPIRY_MARGIN
+    assert cache.get("1") is None and cache.get("2") is None
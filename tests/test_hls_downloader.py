@@ -0,0 +1,98 @@
+import json
+
+import pytest
+import requests
+
+import stream
+from stream import HlsDownloader, HlsPlaylist
+
+def media_playlist(url, count=6):
+    lines = ["#EXTM3U", "#EXT-X-TARGETDURATION:6"]
+    for i in range(count):
+        lines += ["#EXTINF:6.0,", f"seg{i}.ts"]
+    return HlsPlaylist(url, "\n".join(lines + ["#EXT-X-ENDLIST"]))
+
+class Response:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self): pass
+
+class FakeSession:
+    """Serves each segment URI's name as its body; URIs in broken fail."""
+
+    def __init__(self, broken=()):
+        self.broken = set(broken)
+        self.fetched = []
+
+    def get(self, uri, headers=None, timeout=None):
+        self.fetched.append(uri)
+        if uri in self.broken: raise requests.exceptions.ConnectionError(uri)
+        return Response(uri.rsplit('/', 1)[1].encode() + b";")
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(stream.time, "sleep", lambda seconds: None)
+
+URL = "https://cdn/hls/720/index.m3u8?token=1"
+EXPECTED = b"".join(f"seg{i}.ts;".encode() for i in range(6))
+
+def test_downloads_segments_in_order(workdir):
+    path = str(workdir / "out.ts")
+    downloader = HlsDownloader(FakeSession(), media_playlist(URL), path, workers=3)
+    assert downloader.run()
+    assert open(path, 'rb').read() == EXPECTED
+    assert not (workdir / "out.ts.manifest.json").exists()
+    assert downloader.bytes == len(EXPECTED)
+
+def test_resumes_after_an_interruption(workdir):
+    path = str(workdir / "out.ts")
+    broken = FakeSession(broken={"https://cdn/hls/720/seg3.ts"})
+    assert not HlsDownloader(broken, media_playlist(URL), path, workers=2).run()
+    manifest = json.loads((workdir / "out.ts.manifest.json").read_text())
+    assert manifest['written'] == 3 and manifest['offset'] == len(b"seg0.ts;seg1.ts;seg2.ts;")
+
+    # Re-resolved links carry fresh tokens but point at the same variant
+    session = FakeSession()
+    assert HlsDownloader(session, media_playlist("https://cdn/hls/720/index.m3u8?token=2"), path).run()
+    assert open(path, 'rb').read() == EXPECTED
+    assert [u.rsplit('/', 1)[1] for u in session.fetched] == ["seg3.ts", "seg4.ts", "seg5.ts"]
+
+def test_another_variant_starts_over(workdir):
+    path = str(workdir / "out.ts")
+    broken = FakeSession(broken={"https://cdn/hls/720/seg3.ts"})
+    assert not HlsDownloader(broken, media_playlist(URL), path, workers=1).run()
+
+    session = FakeSession()
+    assert HlsDownloader(session, media_playlist("https://cdn/hls/1080/index.m3u8"), path).run()
+    assert len(session.fetched) == 6
+    assert open(path, 'rb').read() == EXPECTED
+
+def test_variant_attributes_are_part_of_the_identity(workdir):
+    path = str(workdir / "out.ts")
+    variant = {'bandwidth': 2800000, 'width': 1280, 'height': 720}
+    broken = FakeSession(broken={"https://cdn/hls/720/seg3.ts"})
+    assert not HlsDownloader(broken, media_playlist(URL), path, workers=1, variant=variant).run()
+
+    downloader = HlsDownloader(FakeSession(), media_playlist(URL), path, variant={**variant, 'bandwidth': 3500000})
+    assert downloader.load_manifest()['written'] == 0
+    downloader = HlsDownloader(FakeSession(), media_playlist(URL), path, variant=variant)
+    assert downloader.load_manifest()['written'] == 3
+
+def test_finished_download_is_not_fetched_again(workdir):
+    path = workdir / "out.ts"
+    path.write_bytes(EXPECTED)
+    session = FakeSession()
+    assert HlsDownloader(session, media_playlist(URL), str(path)).run()
+    assert not session.fetched
+
+def test_byte_ranges_become_range_headers():
+    playlist = HlsPlaylist("https://cdn/v/index.m3u8", "\n".join([
+        "#EXTM3U", "#EXT-X-MAP:URI=\"init.mp4\"",
+        "#EXTINF:6,", "#EXT-X-BYTERANGE:1000@0", "all.mp4",
+        "#EXTINF:6,", "#EXT-X-BYTERANGE:500", "all.mp4",
+    ]))
+    parts = HlsDownloader.build_parts(playlist)
+    assert parts == [("https://cdn/v/init.mp4", {}),
+                     ("https://cdn/v/all.mp4", {'Range': "bytes=0-999"}),
+                     ("https://cdn/v/all.mp4", {'Range': "bytes=1000-1499"})]
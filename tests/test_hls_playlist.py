@@ -0,0 +1,70 @@
+from stream import HlsPlaylist
+
+MASTER = """#EXTM3U
+#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="aud",NAME="English",LANGUAGE="en",DEFAULT=YES,URI="audio/en.m3u8"
+#EXT-X-MEDIA:TYPE=SUBTITLES,GROUP-ID="subs",NAME="English",LANGUAGE="en"
+#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360,CODECS="avc1.4d401e,mp4a.40.2"
+360/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=2800000,AVERAGE-BANDWIDTH=2500000,RESOLUTION=1280x720,FRAME-RATE=23.976
+720/index.m3u8?token=abc
+#EXT-X-STREAM-INF:BANDWIDTH=3500000,RESOLUTION=1280x720,FRAME-RATE=59.940,AUDIO="aud"
+720p60/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=5000000,RESOLUTION=1920x1080
+https://other.cdn/1080/index.m3u8
+"""
+
+MEDIA = """#EXTM3U
+#EXT-X-VERSION:7
+#EXT-X-TARGETDURATION:6
+#EXT-X-MAP:URI="init.mp4"
+#EXTINF:6.006,
+seg0.m4s
+#EXT-X-KEY:METHOD=AES-128,URI="https://keys/k1",IV=0x01
+#EXTINF:5.5,title
+#EXT-X-BYTERANGE:1000@0
+all.m4s
+#EXT-X-KEY:METHOD=NONE
+#EXTINF:4,
+#EXT-X-BYTERANGE:500
+all.m4s
+#EXT-X-ENDLIST
+"""
+
+def test_master_variants_and_renditions():
+    playlist = HlsPlaylist("https://cdn/hls/x/master.m3u8?t=1", MASTER)
+    assert playlist.is_master and not playlist.segments
+    assert [v['height'] for v in playlist.variants] == [360, 720, 720, 1080]
+
+    v720 = playlist.variants[1]
+    assert v720['uri'] == "https://cdn/hls/x/720/index.m3u8?token=abc"
+    assert (v720['bandwidth'], v720['average_bandwidth'], v720['width']) == (2800000, 2500000, 1280)
+    assert v720['frame_rate'] == 23.976
+    assert playlist.variants[0]['codecs'] == "avc1.4d401e,mp4a.40.2"
+    assert playlist.variants[3]['uri'] == "https://other.cdn/1080/index.m3u8"
+
+    audio, = playlist.renditions('AUDIO', 'aud')
+    assert audio['uri'] == "https://cdn/hls/x/audio/en.m3u8" and audio['default']
+    assert playlist.renditions('SUBTITLES', 'subs')[0]['uri'] is None
+
+def test_best_variant_prefers_height_then_frame_rate():
+    playlist = HlsPlaylist("https://cdn/master.m3u8", MASTER)
+    assert playlist.best_variant()['height'] == 1080
+    assert playlist.best_variant(max_height=720)['frame_rate'] == 59.94
+    assert playlist.best_variant(max_height=480)['height'] == 360
+    assert playlist.best_variant(max_height=240) is None
+
+def test_best_variant_within_bandwidth():
+    playlist = HlsPlaylist("https://cdn/master.m3u8", MASTER)
+    assert playlist.best_variant(max_bandwidth=3000000)['bandwidth'] == 2800000
+    assert playlist.best_variant(max_bandwidth=100000) is None
+
+def test_media_segments():
+    playlist = HlsPlaylist("https://cdn/hls/720/index.m3u8", MEDIA)
+    assert not playlist.is_master
+    assert playlist.target_duration == 6.0
+    first, second, third = playlist.segments
+    assert first == {'uri': "https://cdn/hls/720/seg0.m4s", 'duration': 6.006, 'byterange': None,
+                     'key': None, 'map': "https://cdn/hls/720/init.mp4"}
+    assert second['duration'] == 5.5 and second['byterange'] == "1000@0"
+    assert second['key'] == {'method': 'AES-128', 'uri': "https://keys/k1", 'iv': "0x01"}
+    assert third['byterange'] == "500" and third['key'] is None
@@ -0,0 +1,64 @@
+import json
+import time
+
+from stream import MirrorHealth
+
+A, B, C = "https://a", "https://b", "https://c"
+
+def fail(health, url, times=MirrorHealth.FAILURES_TO_OPEN):
+    for _ in range(times): health.record(url, 1.0, False)
+
+def expire_cooldown(health, url):
+    health.data[url]['opened'] = time.time() - MirrorHealth.COOLDOWN - 1
+
+def test_opens_after_consecutive_failures():
+    health = MirrorHealth()
+    fail(health, A, MirrorHealth.FAILURES_TO_OPEN - 1)
+    assert health.state(A) == 'closed' and health.allow(A)
+    health.record(A, 0.1, True) # A success resets the streak
+    fail(health, A, MirrorHealth.FAILURES_TO_OPEN - 1)
+    assert health.state(A) == 'closed'
+    fail(health, A, 1)
+    assert health.state(A) == 'open' and not health.allow(A)
+
+def test_half_open_allows_a_single_trial():
+    health = MirrorHealth()
+    fail(health, A)
+    expire_cooldown(health, A)
+    assert health.state(A) == 'half-open'
+    assert health.allow(A)
+    assert not health.allow(A) # Claimed by the first caller
+
+def test_successful_trial_closes_the_circuit():
+    health = MirrorHealth()
+    fail(health, A)
+    expire_cooldown(health, A)
+    health.allow(A)
+    health.record(A, 0.2, True)
+    assert health.state(A) == 'closed'
+    assert health.data[A]['failures'] == 0
+
+def test_failed_trial_reopens_the_circuit():
+    health = MirrorHealth()
+    fail(health, A)
+    expire_cooldown(health, A)
+    health.allow(A)
+    health.record(A, 1.0, False)
+    assert health.state(A) == 'open'
+
+def test_order_by_state_then_latency():
+    health = MirrorHealth()
+    health.record(A, 0.5, True)
+    health.record(B, 0.1, True)
+    fail(health, C)
+    assert health.order([C, A, B]) == [B, A, C]
+    assert health.order(["https://new", C, A]) == [A, "https://new", C]
+
+def test_flush_writes_only_when_changed(workdir):
+    health = MirrorHealth()
+    health.flush()
+    assert not (workdir / MirrorHealth.FILE_NAME).exists()
+    health.record(A, 0.3, True)
+    health.flush()
+    assert json.loads((workdir / MirrorHealth.FILE_NAME).read_text())[A]['latency'] == 0.3
+    assert MirrorHealth().data == health.data
@@ -0,0 +1,142 @@
+import os
+import json
+import socket
+import threading
+
+import pytest
+
+import stream
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="mpv IPC needs Unix sockets")
+
+class FakeMpv:
+    """
+    Listens on a Unix socket like `mpv --input-ipc-server`, records every
+    command, answers get_property from a dict and lets the test push events.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.commands = []
+        self.properties = {}
+        self.conn = None
+        self.lock = threading.Lock()
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen(1)
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        self.conn, _ = self.server.accept()
+        buffer = b""
+        while True:
+            try:
+                chunk = self.conn.recv(65536)
+            except OSError:
+                return
+            if not chunk: return
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                message = json.loads(line)
+                command = message["command"]
+                self.commands.append(command)
+                if "request_id" not in message: continue
+                reply = {"request_id": message["request_id"], "error": "success"}
+                if isinstance(command, list) and command[0] == "get_property":
+                    if command[1] in self.properties: reply["data"] = self.properties[command[1]]
+                    else: reply["error"] = "property unavailable"
+                self.send(reply)
+
+    def send(self, message):
+        with self.lock:
+            try:
+                self.conn.sendall(json.dumps(message).encode() + b"\n")
+            except OSError: pass
+
+    def hang_up(self):
+        # What the player sees when the user closes the mpv window
+        with self.lock:
+            self.conn.shutdown(socket.SHUT_RDWR)
+
+    def close(self):
+        if self.conn: self.conn.close()
+        self.server.close()
+
+@pytest.fixture
+def mpv(tmp_path):
+    fake = FakeMpv(os.path.join(tmp_path, "mpv.sock"))
+    yield fake
+    fake.close()
+
+@pytest.fixture
+def player(mpv):
+    player = stream.MpvPlayer(ipc_path=mpv.path, binary=None)
+    player.start()
+    yield player
+    player.close()
+
+def named(commands, name):
+    return [c for c in commands if (c.get('name') if isinstance(c, dict) else c[0]) == name]
+
+def test_load_sends_loadfile_with_title_and_start(mpv, player):
+    player.load("http://cdn/a.m3u8", [], "Show, S1=E1", start=95)
+    player.get_property("idle-active") # Round trip so the loadfile has been read
+    loadfile, = named(mpv.commands, "loadfile")
+    assert loadfile["url"] == "http://cdn/a.m3u8"
+    assert loadfile["flags"] == "replace"
+    assert loadfile["options"] == "force-media-title=%11%Show, S1=E1,start=95"
+
+    player.load("http://cdn/b.m3u8", [], "Next", append=True)
+    player.get_property("idle-active")
+    assert named(mpv.commands, "loadfile")[1]["flags"] == "append-play"
+
+def test_subtitles_are_added_once_the_file_loads(mpv, player):
+    player.load("http://cdn/a.m3u8", ["/subs/en.vtt", "/subs/en-sdh.vtt"], "A")
+    assert not named(mpv.commands, "sub-add")
+
+    mpv.properties["path"] = "http://cdn/a.m3u8"
+    mpv.send({"event": "file-loaded"})
+    mpv.send({"event": "end-file", "reason": "eof"})
+    assert player.wait() == "eof"
+    assert named(mpv.commands, "sub-add") == [["sub-add", "/subs/en.vtt", "select"],
+                                              ["sub-add", "/subs/en-sdh.vtt", "auto"]]
+
+def test_wait_polls_time_pos_and_keeps_it_after_mpv_closes(mpv, player):
+    player.load("http://cdn/a.m3u8", [], "A")
+    mpv.properties.update({"path": "http://cdn/a.m3u8", "time-pos": 42.5})
+    mpv.send({"event": "start-file"})
+    mpv.send({"event": "file-loaded"})
+    threading.Timer(1.5, mpv.hang_up).start()
+
+    assert player.wait() == "quit"
+    assert player.position == 42.5
+    assert ["get_property", "time-pos"] in mpv.commands
+    assert not player.running()
+
+def test_stop_reasons_pass_through(mpv, player):
+    mpv.send({"event": "end-file", "reason": "redirect"})
+    mpv.send({"event": "end-file", "reason": "error"})
+    assert player.wait() == "error"
+
+def test_quitting_at_eof_with_keep_open_counts_as_finished(mpv, player):
+    assert ["observe_property", 1, "eof-reached"] in mpv.commands
+    player.load("http://cdn/a.m3u8", [], "A")
+    mpv.send({"event": "start-file"})
+    mpv.send({"event": "property-change", "id": 1, "name": "eof-reached", "data": True})
+    mpv.send({"event": "end-file", "reason": "quit"})
+    assert player.wait() == "eof"
+
+def test_closing_near_the_end_counts_as_finished(mpv, player):
+    player.load("http://cdn/a.m3u8", [], "A")
+    mpv.properties["time-pos"] = 1497.0
+    mpv.send({"event": "start-file"})
+    mpv.send({"event": "property-change", "id": 2, "name": "duration", "data": 1500.0})
+    threading.Timer(1.5, mpv.hang_up).start()
+    assert player.wait() == "eof"
+
+def test_a_new_file_resets_the_end_state(mpv, player):
+    mpv.send({"event": "property-change", "id": 1, "name": "eof-reached", "data": True})
+    mpv.send({"event": "start-file"})
+    mpv.send({"event": "end-file", "reason": "quit"})
+    assert player.wait() == "quit"
@@ -0,0 +1,76 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from stream import SingleFlight
+
+class Lookups(dict):
+    """In-flight table that counts lookups, so a test knows every caller has joined."""
+    count = 0
+
+    def get(self, key, default=None):
+        self.count += 1
+        return super().get(key, default)
+
+def wait_for(condition):
+    deadline = time.time() + 5
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.001)
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    flight.calls = Lookups()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'link': 'x'}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        leader = pool.submit(flight.do, "ep1", fn)
+        started.wait(5)
+        followers = [pool.submit(flight.do, "ep1", fn) for _ in range(7)]
+        wait_for(lambda: flight.calls.count == 8)
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight()
+    flight.calls = Lookups()
+    started, release = threading.Event(), threading.Event()
+
+    def fn():
+        started.set()
+        release.wait(5)
+        raise ValueError("upstream down")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "k", fn)
+        started.wait(5)
+        follower = pool.submit(flight.do, "k", fn)
+        wait_for(lambda: flight.calls.count == 2)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+def test_finished_keys_run_again():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == 1
+    assert flight.do("k", lambda: 2) == 2
+    assert not flight.calls
+
+def test_keys_are_independent():
+    flight = SingleFlight()
+    inner = []
+    assert flight.do("a", lambda: inner.append(flight.do("b", lambda: "b")) or "a") == "a"
+    assert inner == ["b"]